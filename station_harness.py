@@ -0,0 +1,778 @@
+# Offline harness for the KappaCore FM station.
+#
+# Runs test_speech.py against local stand-ins for every external client (Reddit, Gemini, Azure
+# Speech, TwitchIO and pygame.mixer) with configurable latency, jitter and failure rates, drives a
+# scripted scenario and reports time-to-first-audio, dead air, queue waits and memory growth.
+# No credentials, network or sound device needed.
+#
+# Usage:
+#   python station_harness.py lsf                     # One LSF segment
+#   python station_harness.py chat --users 30         # Chat raid with a segment in the middle
+#   python station_harness.py soak --duration 1800    # Segments + chat for half an hour
+#   python station_harness.py lsf --failure-rate 0.2 --latency-scale 2 --wav segment.wav
+#   python station_harness.py lsf --stations 4        # Four stations in one process sharing clients and caches
+
+import argparse
+import asyncio
+import ctypes
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import resource
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+import wave
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIO_FREQUENCY = 24000 # Must match AZURE_AUDIO_FREQUENCY (16-bit mono)
+
+# --- Stand-in Configuration ---
+class StandInProfile:
+    """Latency (seconds), jitter and failure behaviour of the stand-in backends."""
+
+    def __init__(self, latency_scale=1.0, jitter=0.3, failure_rate=0.0, stall_rate=0.0, crash_rate=0.0):
+        self.latency_scale = latency_scale
+        self.jitter = jitter             # +/- fraction applied to every latency
+        self.failure_rate = failure_rate # Chance any single backend call fails
+        self.stall_rate = stall_rate     # Chance a TTS stream stalls mid-utterance
+        self.crash_rate = crash_rate     # Chance a synthesis call kills its content worker process (--workers only)
+        self.reddit_latency = 0.8
+        self.gemini_latency = 1.8
+        self.azure_connect_latency = 0.35
+        self.azure_first_byte_latency = 0.45
+        self.azure_realtime_factor = 0.15 # Seconds of synthesis per second of audio
+        self.speech_chars_per_second = 15.0
+        self.sfx_seconds = 3.0
+        self.track_seconds = 90.0
+        self.new_posts_per_fetch = 2
+
+    def sleep(self, base_seconds):
+        if base_seconds <= 0: return
+        time.sleep(max(0.0, base_seconds * self.latency_scale * (1 + random.uniform(-self.jitter, self.jitter))))
+
+    def fails(self):
+        return random.random() < self.failure_rate
+
+    def maybe_crash(self):
+        if multiprocessing.parent_process() is not None and random.random() < self.crash_rate:
+            print(f"Stand-in crash: killing process {os.getpid()}")
+            os._exit(3)
+
+profile = StandInProfile()
+call_counts = {"reddit": 0, "gemini": 0, "azure": 0, "failures": 0}
+_counts_lock = threading.Lock()
+
+def _count(name, failed=False):
+    with _counts_lock:
+        call_counts[name] += 1
+        call_counts["failures"] += failed
+
+# --- Audio Sinks ---
+class NullAudioSink:
+    """Records when speech and music play without producing any sound."""
+
+    def __init__(self):
+        self.speech_intervals = [] # (start, end) in perf_counter time
+
+    def speech(self, start, end, pcm):
+        self.speech_intervals.append((start, end))
+
+    def ready_gap(self, since):
+        """Silence on the speech channel between max(since, end of the previous speech) and the latest start."""
+        if not self.speech_intervals: return 0.0
+        latest_start = self.speech_intervals[-1][0]
+        previous_end = max((end for start, end in self.speech_intervals[:-1] if end <= latest_start + 1e-6), default=since)
+        return max(0.0, latest_start - max(since, previous_end))
+
+    def close(self):
+        pass
+
+class WavAudioSink(NullAudioSink):
+    """Also renders speech onto a timeline in a WAV file (music and SFX are left silent)."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.started_at = time.perf_counter()
+        self.timeline = bytearray()
+
+    def speech(self, start, end, pcm):
+        super().speech(start, end, pcm)
+        if pcm is None: return
+        offset = int((start - self.started_at) * AUDIO_FREQUENCY) * 2
+        if len(self.timeline) < offset: self.timeline.extend(bytes(offset - len(self.timeline)))
+        self.timeline[offset:offset + len(pcm)] = pcm
+
+    def close(self):
+        with wave.open(self.path, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(AUDIO_FREQUENCY)
+            wav_file.writeframes(bytes(self.timeline))
+        print(f"Wrote {len(self.timeline) / 2 / AUDIO_FREQUENCY:.1f}s of speech to {self.path}")
+
+sink = NullAudioSink()
+
+# --- pygame Stand-in ---
+class FakeSound:
+    def __init__(self, file=None, buffer=None):
+        if buffer is not None:
+            self.pcm = bytes(buffer)
+            self.length = len(self.pcm) / 2 / AUDIO_FREQUENCY
+        elif hasattr(file, "read"): # An in-memory music track (software mixer)
+            self.pcm = None
+            self.length = profile.track_seconds
+        else:
+            if not os.path.exists(file): raise FileNotFoundError(file)
+            self.pcm = None
+            self.length = profile.sfx_seconds
+
+    def get_length(self):
+        return self.length
+
+    def get_raw(self):
+        return self.pcm if self.pcm is not None else _tone(self.length)
+
+    def play(self):
+        channel = fake_mixer.find_channel(True)
+        channel.play(self)
+        return channel
+
+class FakeChannel:
+    """Plays sounds against the wall clock; a queued sound starts exactly when the current one ends."""
+
+    def __init__(self, index):
+        self.index = index
+        self._lock = threading.Lock()
+        self._sound = None
+        self._queued = None
+        self._ends_at = 0.0
+
+    def _start(self, sound, at):
+        self._sound = sound
+        self._ends_at = at + sound.length
+        sink.speech(at, self._ends_at, sound.pcm)
+
+    def _advance(self):
+        now = time.perf_counter()
+        while self._sound is not None and now >= self._ends_at:
+            ended_at, self._sound = self._ends_at, None
+            if self._queued is not None:
+                queued, self._queued = self._queued, None
+                self._start(queued, ended_at)
+
+    def play(self, sound):
+        with self._lock:
+            self._queued = None
+            self._start(sound, time.perf_counter())
+
+    def queue(self, sound):
+        with self._lock:
+            self._advance()
+            if self._sound is None: self._start(sound, time.perf_counter())
+            else: self._queued = sound
+
+    def get_busy(self):
+        with self._lock:
+            self._advance()
+            return self._sound is not None
+
+    def get_sound(self):
+        with self._lock:
+            self._advance()
+            return self._sound
+
+    def get_queue(self):
+        with self._lock:
+            self._advance()
+            return self._queued
+
+    def stop(self):
+        with self._lock:
+            self._sound = self._queued = None
+
+class FakeMusic:
+    def __init__(self):
+        self._volume = 1.0
+        self._ends_at = 0.0
+        self.tracks_started = 0
+
+    def load(self, file, namehint=""):
+        self._volume = 1.0 # Like pygame, loading resets the volume
+
+    def play(self, loops=0):
+        self._ends_at = time.perf_counter() + profile.track_seconds
+        self.tracks_started += 1
+
+    def get_busy(self):
+        return time.perf_counter() < self._ends_at
+
+    def set_volume(self, volume):
+        self._volume = volume
+
+    def get_volume(self):
+        return self._volume
+
+class FakeMixer(types.ModuleType):
+    def __init__(self):
+        super().__init__("pygame.mixer")
+        self.Sound = FakeSound
+        self.music = FakeMusic()
+        self._channels = [FakeChannel(i) for i in range(8)]
+        self._reserved = 0
+        self._initialized = False
+
+    def init(self, frequency=AUDIO_FREQUENCY, size=-16, channels=1, **kwargs):
+        self._initialized = True
+
+    def get_init(self):
+        return (AUDIO_FREQUENCY, -16, 1) if self._initialized else None
+
+    def quit(self):
+        self._initialized = False
+
+    def set_reserved(self, count):
+        self._reserved = count
+
+    def get_num_channels(self):
+        return len(self._channels)
+
+    def set_num_channels(self, count):
+        self._channels += [FakeChannel(i) for i in range(len(self._channels), count)]
+
+    def Channel(self, index):
+        return self._channels[index]
+
+    def find_channel(self, force=False):
+        for channel in self._channels[self._reserved:]:
+            if not channel.get_busy(): return channel
+        return self._channels[self._reserved] if force else None
+
+fake_mixer = FakeMixer()
+
+# --- Reddit (PRAW) Stand-in ---
+class FakeSubmission:
+    def __init__(self, submission_id, title, stickied=False):
+        self.id = submission_id
+        self.title = title
+        self.stickied = stickied
+
+STREAMERS = ["xQc", "Pokimane", "Kai Cenat", "HasanAbi", "Asmongold", "Ludwig", "IShowSpeed", "Mizkif", "Emiru", "Shroud"]
+EVENTS = ["gets banned mid-stream", "reacts to the new patch", "loses a 50k bet", "accidentally leaks DMs",
+          "announces a subathon", "rage quits on stream", "gets swatted again", "signs a mystery deal", "tries cooking live"]
+
+class FakeSubreddit:
+    def __init__(self):
+        self.display_name = "LivestreamFail"
+        self._posts = [FakeSubmission("sticky", "Weekly discussion thread", stickied=True)]
+        self._next_id = 0
+        self._add_posts(8)
+
+    def _add_posts(self, count):
+        for _ in range(count):
+            self._next_id += 1
+            title = f"{random.choice(STREAMERS)} {random.choice(EVENTS)}"
+            self._posts.insert(1, FakeSubmission(f"t3_{self._next_id:05d}", title))
+
+    def top(self, time_filter="day", limit=25):
+        failed = profile.fails()
+        _count("reddit", failed)
+        profile.sleep(profile.reddit_latency)
+        if failed: raise RuntimeError("stand-in Reddit failure (503)")
+        self._add_posts(profile.new_posts_per_fetch) # Some churn between fetches
+        return iter(self._posts[:limit])
+
+class FakeReddit:
+    def __init__(self, **kwargs):
+        self._subreddit = FakeSubreddit()
+
+    def subreddit(self, name):
+        return self._subreddit
+
+# --- Gemini Stand-in ---
+class FakeGeminiResponse:
+    def __init__(self, text):
+        self.candidates = [text]
+        self.text = text
+
+class FakeGenerativeModel:
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, safety_settings=None, generation_config=None):
+        failed = profile.fails()
+        _count("gemini", failed)
+        batch = re.search(r"JSON array of (\d+) strings", prompt)
+        count = int(batch.group(1)) if batch else 1
+        profile.sleep(profile.gemini_latency * (1 + 0.4 * (count - 1)))
+        if failed: raise RuntimeError("stand-in Gemini failure (429)")
+        reactions = [f"No way, chat, this is peak content number {random.randint(1, 999)}! "
+                     f"I literally cannot with these people. Somebody clip it before it gets deleted!" for _ in range(count)]
+        return FakeGeminiResponse(json.dumps(reactions) if batch else reactions[0])
+
+# --- Azure Speech Stand-in ---
+class _Enum:
+    def __init__(self, *names):
+        for name in names: setattr(self, name, name)
+
+ResultReason = _Enum("SynthesizingAudioCompleted", "SynthesizingAudioStarted", "Canceled")
+CancellationReason = _Enum("Error", "EndOfStream", "CancelledByUser")
+StreamStatus = _Enum("NoData", "PartialData", "AllData", "Canceled")
+SpeechSynthesisOutputFormat = _Enum("Riff24Khz16BitMonoPcm", "Raw24Khz16BitMonoPcm")
+
+class FakeCancellationDetails:
+    def __init__(self, reason, error_details=""):
+        self.reason = reason
+        self.error_details = error_details
+
+def _tone(seconds):
+    """Quiet 220 Hz tone so rendered WAVs show where speech was."""
+    frames = int(seconds * AUDIO_FREQUENCY)
+    period = [int(1500 * math.sin(2 * math.pi * 220 * i / AUDIO_FREQUENCY)) for i in range(AUDIO_FREQUENCY // 220)]
+    one_period = struct.pack(f"<{len(period)}h", *period)
+    return (one_period * (frames // len(period) + 1))[:frames * 2]
+
+def _speech_seconds(ssml_string):
+    text = re.sub(r"<[^>]+>", " ", ssml_string)
+    return max(0.5, len(" ".join(text.split())) / profile.speech_chars_per_second)
+
+class FakeSynthesisResult:
+    def __init__(self, reason, audio_data=b"", cancellation_details=None):
+        self.reason = reason
+        self.audio_data = audio_data
+        self.cancellation_details = cancellation_details
+        self.stream_seconds = 0.0
+        self.stalls = False
+        self.stopped = threading.Event()
+
+class _Completed:
+    def __init__(self, value):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+class FakeSpeechConfig:
+    def __init__(self, subscription=None, region=None, **kwargs):
+        self.output_format = SpeechSynthesisOutputFormat.Riff24Khz16BitMonoPcm
+
+    def set_speech_synthesis_output_format(self, output_format):
+        self.output_format = output_format
+
+class FakeSpeechSynthesizer:
+    def __init__(self, speech_config=None, audio_config=None):
+        self.speech_config = speech_config
+        self.connection = None
+        self._streaming = None
+
+    def _connect_if_needed(self):
+        if self.connection is None or not self.connection.is_open:
+            profile.sleep(profile.azure_connect_latency) # New connection + TLS handshake
+
+    def speak_ssml_async(self, ssml_string):
+        profile.maybe_crash()
+        failed = profile.fails()
+        _count("azure", failed)
+        self._connect_if_needed()
+        seconds = _speech_seconds(ssml_string)
+        profile.sleep(profile.azure_first_byte_latency + seconds * profile.azure_realtime_factor)
+        if failed:
+            return _Completed(FakeSynthesisResult(ResultReason.Canceled, cancellation_details=FakeCancellationDetails(CancellationReason.Error, "stand-in Azure failure")))
+        return _Completed(FakeSynthesisResult(ResultReason.SynthesizingAudioCompleted, _tone(seconds)))
+
+    def start_speaking_ssml_async(self, ssml_string):
+        failed = profile.fails()
+        _count("azure", failed)
+        self._connect_if_needed()
+        profile.sleep(profile.azure_first_byte_latency)
+        if failed:
+            return _Completed(FakeSynthesisResult(ResultReason.Canceled, cancellation_details=FakeCancellationDetails(CancellationReason.Error, "stand-in Azure failure")))
+        seconds = _speech_seconds(ssml_string)
+        result = FakeSynthesisResult(ResultReason.SynthesizingAudioStarted, _tone(seconds))
+        result.stream_seconds = seconds
+        result.stalls = random.random() < profile.stall_rate
+        self._streaming = result
+        return _Completed(result)
+
+    def stop_speaking_async(self):
+        if self._streaming is not None: self._streaming.stopped.set() # Unblocks a stalled read, like the real SDK
+        return _Completed(None)
+
+class FakeAudioDataStream:
+    def __init__(self, result):
+        self._result = result
+        self._position = 0
+        self.status = StreamStatus.PartialData
+        self.cancellation_details = None
+
+    def read_data(self, audio_buffer, pos=None):
+        pcm = self._result.audio_data
+        if self._result.stopped.is_set(): return 0
+        remaining = len(pcm) - self._position
+        if remaining <= 0:
+            self.status = StreamStatus.AllData
+            return 0
+        filled_size = min(len(audio_buffer), remaining)
+        if self._result.stalls and self._position >= len(pcm) // 2:
+            self._result.stalls = False
+            if self._result.stopped.wait(30): return 0 # Long enough to trip the stall timeout, unless stopped
+        profile.sleep(filled_size / 2 / AUDIO_FREQUENCY * profile.azure_realtime_factor)
+        # The real SDK fills the caller's bytes object in place; do the same
+        ctypes.memmove(ctypes.c_char_p(audio_buffer), pcm[self._position:self._position + filled_size], filled_size)
+        self._position += filled_size
+        return filled_size
+
+class _EventSignal:
+    def __init__(self):
+        self._callbacks = []
+
+    def connect(self, callback):
+        self._callbacks.append(callback)
+
+    def fire(self):
+        for callback in self._callbacks: callback(None)
+
+class FakeConnection:
+    def __init__(self, synthesizer):
+        self.connected = _EventSignal()
+        self.disconnected = _EventSignal()
+        self.is_open = False
+        synthesizer.connection = self
+
+    @classmethod
+    def from_speech_synthesizer(cls, synthesizer):
+        return cls(synthesizer)
+
+    def open(self, for_continuous_recognition):
+        def connect():
+            profile.sleep(profile.azure_connect_latency)
+            self.is_open = True
+            self.connected.fire()
+        threading.Thread(target=connect, daemon=True).start()
+
+    def close(self):
+        self.is_open = False
+        self.disconnected.fire()
+
+# --- TwitchIO Stand-in ---
+class FakeBot:
+    def __init__(self, token=None, prefix="!", initial_channels=None, **kwargs):
+        self.nick = "pixel_harness"
+        self.user_id = 0
+
+    async def handle_commands(self, message):
+        pass
+
+    def run(self):
+        raise RuntimeError("The harness drives the bot directly; don't call run().")
+
+def _command(name=None, **kwargs):
+    return lambda func: func
+
+class FakeAuthor:
+    def __init__(self, name):
+        self.name = name
+
+class FakeContext:
+    def __init__(self, user):
+        self.author = FakeAuthor(user)
+        self.replies = []
+
+    async def send(self, text):
+        self.replies.append(text)
+
+def install_stand_ins():
+    """Registers the stand-in modules so importing test_speech picks them up instead of the real clients."""
+    def module(name, **attributes):
+        mod = types.ModuleType(name)
+        mod.__dict__.update(attributes)
+        sys.modules[name] = mod
+        return mod
+
+    pygame = module("pygame", mixer=fake_mixer)
+    sys.modules["pygame.mixer"] = fake_mixer
+    pygame.mixer = fake_mixer
+
+    module("praw", Reddit=FakeReddit)
+    genai = module("google.generativeai", configure=lambda api_key=None, **kwargs: None, GenerativeModel=FakeGenerativeModel)
+    module("google", generativeai=genai)
+
+    speechsdk = module("azure.cognitiveservices.speech",
+                       SpeechConfig=FakeSpeechConfig, SpeechSynthesizer=FakeSpeechSynthesizer, AudioDataStream=FakeAudioDataStream,
+                       Connection=FakeConnection, ResultReason=ResultReason, CancellationReason=CancellationReason,
+                       StreamStatus=StreamStatus, SpeechSynthesisOutputFormat=SpeechSynthesisOutputFormat)
+    cognitiveservices = module("azure.cognitiveservices", speech=speechsdk)
+    module("azure", cognitiveservices=cognitiveservices)
+
+    commands = module("twitchio.ext.commands", Bot=FakeBot, Context=FakeContext, command=_command)
+    ext = module("twitchio.ext", commands=commands)
+    module("twitchio", ext=ext)
+
+    module("dotenv", load_dotenv=lambda *args, **kwargs: False)
+
+    for variable in ("AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION", "GEMINI_API_KEY", "REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET",
+                     "REDDIT_USER_AGENT", "REDDIT_USERNAME", "REDDIT_PASSWORD", "TWITCH_OAUTH_TOKEN", "TWITCH_BOT_NICKNAME", "TWITCH_CHANNEL"):
+        os.environ[variable] = "harness"
+
+# --- Metrics ---
+class StationMonitor:
+    """Samples the station every few milliseconds to measure dead air and collects time-to-first-audio."""
+
+    SAMPLE_INTERVAL = 0.01
+
+    def __init__(self, station, bot):
+        self.station = station
+        self.bot = bot
+        self.dead_air_seconds = 0.0
+        self.music_gap_seconds = 0.0
+        self.on_air_latencies = [] # Per utterance: ready to play (left the scheduler, previous item done) -> first audio
+        self.segment_ttfa = []     # Per segment: fetch started -> first speech
+        self.on_air_times = []     # Fallback for segment_ttfa when speech plays in another process
+        self.extra_bots = []       # Bots of the other stations (--stations)
+        self._segment_started_at = []
+        self._running = False
+
+    def speech_busy(self):
+        return fake_mixer.Channel(0).get_busy()
+
+    def work_pending(self):
+        return (self.station.audio_task_queue.qsize() > 0 or self.bot._prepared_queue.qsize() > 0
+                or not self.bot._processor_idle)
+
+    def extra_stations_busy(self):
+        return any(bot.station.queue.qsize() > 0 or bot._prepared_queue.qsize() > 0 or not bot._processor_idle
+                   or not bot.station.audio_engine.is_idle() for bot in self.extra_bots)
+
+    def mark_segment(self):
+        self._segment_started_at.append(time.perf_counter())
+
+    def _sample(self):
+        last = time.perf_counter()
+        while self._running:
+            time.sleep(self.SAMPLE_INTERVAL)
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            speech = self.speech_busy()
+            music = fake_mixer.music.get_busy()
+            if not speech and not music: self.music_gap_seconds += elapsed
+            if (not speech and not music) or (not speech and self.work_pending()):
+                self.dead_air_seconds += elapsed
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._running = True
+        self._thread = threading.Thread(target=self._sample, name="harness-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+        speech_starts = [start for start, _ in sink.speech_intervals] or self.on_air_times
+        for segment_started_at in self._segment_started_at:
+            first_speech = min((start for start in speech_starts if start >= segment_started_at), default=None)
+            if first_speech is not None: self.segment_ttfa.append(first_speech - segment_started_at)
+
+def _percentile(values, percentile):
+    if not values: return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+# --- Scenarios ---
+async def wait_until_drained(station, bot, monitor, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if not monitor.work_pending() and station.audio_engine.is_idle() and not monitor.speech_busy() and not monitor.extra_stations_busy():
+            return True
+        await asyncio.sleep(0.1)
+    print(f"WARN: Station still busy after {timeout}s.")
+    return False
+
+async def run_segment(station, bot, monitor):
+    monitor.mark_segment()
+    await asyncio.gather(*(each.run_lsf_segment() for each in [bot] + monitor.extra_bots)) # Every station at once
+
+async def chat_burst(bot, users, messages_per_user, window_seconds, duplicate_rate=0.3):
+    """Fires !pixel say/react commands from many users at random times within the window."""
+    async def send(user, delay):
+        await asyncio.sleep(delay)
+        ctx = FakeContext(user)
+        if random.random() < duplicate_rate:
+            args = "say Pixel is the best radio host on Twitch!" # Spam the same line
+        elif random.random() < 0.5:
+            args = f"react {random.choice(STREAMERS)} {random.choice(EVENTS)}"
+        else:
+            args = f"say hello from {user}, message {random.randint(1, 99)}"
+        await bot.pixel_command(ctx, args=args)
+    users = [f"viewer{i:03d}" for i in range(users)]
+    await asyncio.gather(*(send(user, random.uniform(0, window_seconds)) for user in users for _ in range(messages_per_user)))
+
+async def scenario_lsf(station, bot, monitor, args):
+    await run_segment(station, bot, monitor)
+    await wait_until_drained(station, bot, monitor, timeout=600)
+
+async def scenario_chat(station, bot, monitor, args):
+    burst = asyncio.ensure_future(chat_burst(bot, args.users, args.messages_per_user, args.burst_window))
+    await asyncio.sleep(args.burst_window / 2)
+    await run_segment(station, bot, monitor) # Scheduled content in the middle of the raid
+    await burst
+    await wait_until_drained(station, bot, monitor, timeout=600)
+
+async def scenario_soak(station, bot, monitor, args):
+    ends_at = time.perf_counter() + args.duration
+    next_segment_at = time.perf_counter()
+    chat_tasks = []
+    while time.perf_counter() < ends_at:
+        if time.perf_counter() >= next_segment_at:
+            await run_segment(station, bot, monitor)
+            next_segment_at = time.perf_counter() + args.segment_interval
+        if random.random() < args.chat_rate:
+            chat_tasks.append(asyncio.ensure_future(chat_burst(bot, 1, 1, 0.0)))
+        await asyncio.sleep(1.0)
+    await asyncio.gather(*chat_tasks)
+    await wait_until_drained(station, bot, monitor, timeout=600)
+
+SCENARIOS = {"lsf": scenario_lsf, "chat": scenario_chat, "soak": scenario_soak}
+
+async def drive(station, args):
+    bot = station.PixelBot()
+    monitor = StationMonitor(station, bot)
+    on_air = bot.on_air
+    def record_on_air(job):
+        monitor.on_air_times.append(time.perf_counter())
+        if not args.workers and not args.software_mixer: monitor.on_air_latencies.append(sink.ready_gap(job.dequeued_at))
+        on_air(job)
+    bot.on_air = record_on_air
+
+    station.FETCH_INTERVAL_SECONDS = 10 ** 9 # Scenarios trigger segments themselves
+    station.SEGMENT_COMPILER_ENABLED = args.compiled
+    station.METRICS_PORT = None # No HTTP endpoint; the report below reads the metrics directly
+    station.MULTIPROCESS_WORKERS = args.workers
+    if args.software_mixer:
+        station.AUDIO_BACKEND = "software"
+        station.SOFTWARE_MIXER_SINK = f"wav:{os.path.abspath(args.wav)}" if args.wav else "null"
+        station.SOFTWARE_MIXER_SPEED = args.mixer_speed
+    for index in range(2, args.stations + 1):
+        sink_spec = f"wav:{os.path.abspath(args.wav)[:-4]}-station{index}.wav" if args.wav and args.software_mixer else "null"
+        station.add_station(f"station{index}", f"harness{index}", sink=sink_spec)
+    monitor.extra_bots = [station.PixelBot(extra) for extra in station.stations[1:]]
+    await bot.event_ready()
+    for extra_bot in monitor.extra_bots: await extra_bot.event_ready()
+    # Measure steady state, not warm-up
+    if args.workers: await asyncio.sleep(3.0) # Worker processes warm their own clients
+    else: await asyncio.to_thread(station.synthesizer_client.wait_ready)
+
+    tracemalloc.start()
+    baseline_memory, _ = tracemalloc.get_traced_memory()
+    monitor.start()
+    await SCENARIOS[args.scenario](station, bot, monitor, args)
+    monitor.stop()
+    final_memory, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for each in [bot] + monitor.extra_bots:
+        for task in (each._audio_processor_task, each._audio_prefetcher_task, each._lsf_fetcher_task):
+            if task: task.cancel()
+    for each in station.stations: each.audio_engine.stop()
+    if station.content_workers is not None: station.content_workers.stop()
+
+    hours = monitor.elapsed / 3600
+    print("\n================ Station harness report ================")
+    print(f"Scenario: {args.scenario} ({monitor.elapsed:.1f}s, latency x{profile.latency_scale}, "
+          f"jitter {profile.jitter:.0%}, failure rate {profile.failure_rate:.0%}, stall rate {profile.stall_rate:.0%})")
+    if monitor.segment_ttfa:
+        print(f"Segment time-to-first-audio: mean {statistics.mean(monitor.segment_ttfa):.2f}s, max {max(monitor.segment_ttfa):.2f}s "
+              f"over {len(monitor.segment_ttfa)} segments")
+    if args.software_mixer:
+        mixer = station.audio_engine
+        print(f"Software mixer: {mixer.rendered_seconds:.1f}s rendered in {monitor.elapsed:.1f}s, dead air {mixer.dead_air_seconds:.1f}s, "
+              f"limiter engaged in {mixer.limited_blocks} blocks")
+    elif args.workers:
+        print(f"Multi-process: {args.workers} content workers, {station.content_workers.restarts} worker restarts, "
+              f"{station.audio_engine.restarts} audio process restarts (utterance latency and dead air are measured in-process only)")
+    else:
+        latencies = monitor.on_air_latencies
+        print(f"Utterance time-to-first-audio: p50 {_percentile(latencies, 50):.2f}s, p95 {_percentile(latencies, 95):.2f}s, "
+              f"max {max(latencies, default=float('nan')):.2f}s over {len(latencies)} items")
+        print(f"Dead air: {monitor.dead_air_seconds:.1f}s ({monitor.dead_air_seconds / hours:.0f}s per hour), "
+              f"music gaps {monitor.music_gap_seconds:.1f}s, {fake_mixer.music.tracks_started} tracks started")
+    queue = station.audio_task_queue
+    print(f"Queue wait: p50 {queue.wait_percentile(50):.2f}s, p99 {queue.wait_percentile(99):.2f}s; "
+          f"{queue.dropped_stale} stale dropped, {queue.rejected} rejected, {queue.coalesced} coalesced")
+    print(f"Memory: {(final_memory - baseline_memory) / 1024:+.0f} KB traced growth, peak {peak_memory / (1024 * 1024):.1f} MB, "
+          f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    if args.stations > 1:
+        for each in station.stations: print(each.stats())
+        print("Stand-in calls per station: " + ", ".join(f"{name} {call_counts[name] / args.stations:.1f}" for name in ("reddit", "gemini", "azure")))
+    print(f"Stand-in calls{' (this process)' if args.workers else ''}: {call_counts}")
+    if not args.workers: print(f"{station.tts_cache.stats()}\n{station.synthesizer_client.get().stats()}")
+    if args.metrics: print(f"\n{station.metrics.render()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the station offline against local stand-in backends.")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply every stand-in latency")
+    parser.add_argument("--jitter", type=float, default=0.3, help="+/- fraction of random latency jitter")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Chance any backend call fails")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Chance a TTS stream stalls mid-utterance")
+    parser.add_argument("--users", type=int, default=20, help="Chat users in a burst")
+    parser.add_argument("--messages-per-user", type=int, default=2)
+    parser.add_argument("--burst-window", type=float, default=20.0, help="Seconds the chat burst is spread over")
+    parser.add_argument("--duration", type=float, default=600.0, help="Soak length in seconds")
+    parser.add_argument("--segment-interval", type=float, default=120.0, help="Seconds between soak segments")
+    parser.add_argument("--chat-rate", type=float, default=0.1, help="Chance of a chat command each second of the soak")
+    parser.add_argument("--wav", help="Render speech to this WAV file instead of discarding it")
+    parser.add_argument("--workers", type=int, default=0, help="Run in multi-process mode with this many content workers")
+    parser.add_argument("--crash-rate", type=float, default=0.0, help="Chance a synthesis call kills its content worker")
+    parser.add_argument("--software-mixer", action="store_true", help="Mix in NumPy instead of pygame channels (--wav then gets the full mix)")
+    parser.add_argument("--mixer-speed", type=float, default=1.0, help="Software mixer render speed vs realtime (0 = unthrottled)")
+    parser.add_argument("--stations", type=int, default=1, help="Host this many stations in one process (extra ones mix in software)")
+    parser.add_argument("--compiled", action="store_true", help="Compile LSF segments into gapless parts instead of queueing them item by item")
+    parser.add_argument("--metrics", action="store_true", help="Print the station's Prometheus metrics after the report")
+    parser.add_argument("--seed", type=int, help="Random seed for repeatable runs")
+    parser.add_argument("--keep-state", action="store_true", help="Keep the temporary cache/index folder")
+    args = parser.parse_args()
+    if args.workers and args.stations > 1: parser.error("--stations can't be combined with --workers")
+
+    global sink
+    if args.seed is not None: random.seed(args.seed)
+    profile.latency_scale = args.latency_scale
+    profile.jitter = args.jitter
+    profile.failure_rate = args.failure_rate
+    profile.stall_rate = args.stall_rate
+    profile.crash_rate = args.crash_rate
+    os.environ["KAPPACORE_HARNESS_PROFILE"] = json.dumps(vars(profile)) # For --workers child processes
+    if args.wav and not args.software_mixer: sink = WavAudioSink(os.path.abspath(args.wav))
+
+    # Run in a scratch folder so the TTS cache and seen-post index start empty
+    work_dir = tempfile.mkdtemp(prefix="kappacore-harness-")
+    os.symlink(os.path.join(REPO_DIR, "music"), os.path.join(work_dir, "music"))
+    os.symlink(os.path.join(REPO_DIR, "drama_stinger.mp3"), os.path.join(work_dir, "drama_stinger.mp3"))
+    os.chdir(work_dir)
+    sys.path.insert(0, REPO_DIR)
+
+    install_stand_ins()
+    import test_speech as station
+    try:
+        asyncio.run(drive(station, args))
+    finally:
+        sink.close()
+        if args.keep_state: print(f"State kept in {work_dir}")
+        else: shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
+elif __name__ == "__mp_main__":
+    # Content worker and audio processes (--workers) re-import this file; give them the same stand-ins
+    vars(profile).update(json.loads(os.environ.get("KAPPACORE_HARNESS_PROFILE", "{}")))
+    install_stand_ins()
@@ -1,17 +1,77 @@
 # Import necessary libraries
 import os
-import azure.cognitiveservices.speech as speechsdk
+import sys
 import time      # For delays and timing
+import math
 import random    # For selecting music and simulating triggers
-import google.generativeai as genai # For generating Pixel's text
+import importlib # For deferring the heavy SDK imports until first use
 from dotenv import load_dotenv      # For loading API keys from .env file
 import pygame    # For handling ALL audio playback (music and speech)
 import io        # For handling in-memory audio stream
-import praw      # For interacting with Reddit API
+import array     # Sample-level mixing for compiled LSF segments
 import html      # For escaping special characters in text for SSML
+import threading # For cancelling streaming synthesis running in the executor
+import wave      # For unpacking buffered RIFF audio when resuming a stalled stream
+import hashlib   # For content-addressing cached TTS audio
+import json      # For parsing batched Gemini reactions
+import sqlite3   # For the persistent seen-post index
+import concurrent.futures # Dedicated executor sized to the synthesizer pool
+import queue     # Commands for the audio engine thread
+import heapq     # Priority ordering for the audio task scheduler
+import itertools
+import http.server # Local Prometheus-style metrics endpoint
+import multiprocessing # Optional content worker / audio processes
+from multiprocessing import shared_memory # PCM handed from content workers to the audio process
+from multiprocessing.connection import wait as wait_for_connections # Content worker pipes
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from collections import OrderedDict # LRU bookkeeping for the TTS cache
 import asyncio   # For asynchronous operations (Twitch bot)
 from twitchio.ext import commands # TwitchIO bot framework
 
+# --- Deferred Imports ---
+class LazyModule:
+    """Stands in for a heavy module and imports it on first attribute access (or load())."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None: self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+class LazyInstance:
+    """Stands in for a module-level object and builds it on first attribute access (or load()).
+
+    Spawned worker and audio processes re-import this file, so anything with startup cost (disk
+    scans, prebuffered music, database handles) is only built by the processes that use it.
+    """
+
+    def __init__(self, label, create):
+        self.label = label
+        self._create = create
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    with startup.phase(self.label): self._instance = self._create()
+        return self._instance
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+speechsdk = LazyModule("azure.cognitiveservices.speech") # Azure AI Speech
+genai = LazyModule("google.generativeai")                 # For generating Pixel's text
+praw = LazyModule("praw")                                 # For interacting with Reddit API
+np = LazyModule("numpy")                                  # Software mixer only
+
 # --- Load Environment Variables ---
 load_dotenv()
 print("Loaded environment variables from .env file (if it exists).")
@@ -34,43 +94,953 @@ twitch_channel = os.environ.get("TWITCH_CHANNEL")
 MUSIC_FOLDER = "music" # Create this subfolder and put audio files in it
 MUSIC_VOLUME_NORMAL = 0.8 # Music volume (0.0 to 1.0)
 MUSIC_VOLUME_LOW = 0.2    # Music volume when Pixel speaks
+DUCK_RAMP_SECONDS = 0.25   # Fade time when lowering music for speech
+UNDUCK_RAMP_SECONDS = 0.8  # Fade time when bringing music back up
+UNDUCK_DELAY_SECONDS = 0.3 # Silence after the last speech item before music comes back up
+AUDIO_ENGINE_TICK = 0.005  # Audio thread service interval (seconds)
+
+# Audio backend configuration
+AUDIO_BACKEND = "pygame" # "pygame" plays through pygame.mixer channels; "software" mixes in NumPy and writes to a sink
+SOFTWARE_MIXER_SINK = "device" # "device", "wav:<path>", "pipe:<path>" (raw s16le), "stdout" (raw s16le) or "null"
+PIPE_SINK_RETRY_SECONDS = 0.5 # How often a "pipe:" sink with no reader tries to connect again (the mix is dropped meanwhile)
+SOFTWARE_MIXER_SPEED = 1.0 # Render speed relative to realtime for non-device sinks (0 = as fast as possible)
+SOFTWARE_MIXER_BLOCK_FRAMES = 1024 # Samples mixed per block (~43 ms at 24 kHz)
+SOFTWARE_MIXER_LIMIT = 0.89 * 32767 # Limiter ceiling (about -1 dBFS)
+SOFTWARE_MIXER_RELEASE_SECONDS = 0.25 # Limiter release time
+
+MUSIC_RESCAN_INTERVAL = 60 # Seconds between background checks of the music folder for changes
 
 # SFX Configuration
 DRAMA_STINGER_SFX = "drama_stinger.mp3" # <<< PUT YOUR STINGER FILENAME HERE
+SOUND_BANK_MAX_BYTES = 64 * 1024 * 1024 # Decoded SFX kept resident in memory
 
 # Audio format configuration
 AZURE_AUDIO_FREQUENCY = 24000 # Hz (for Riff24Khz16BitMonoPcm)
 AZURE_AUDIO_FORMAT_BITS = -16 # Signed 16-bit (pygame format)
 AZURE_AUDIO_CHANNELS = 1    # Mono
+TTS_VOICE = "en-US-JennyNeural" # Azure neural voice of the default station
+
+# Look-ahead configuration
+LOOKAHEAD_DEPTH = 3 # Max queued audio tasks synthesized/decoded ahead while the current one plays
+LOOKAHEAD_MAX_BYTES = 32 * 1024 * 1024 # Stop preparing more tasks once this much decoded audio is waiting
+
+# Streaming TTS configuration
+TTS_STREAMING_ENABLED = True # Play speech as Azure renders it when nothing was prepared ahead
+STREAM_CHUNK_SECONDS = 0.25  # Audio per streamed pygame chunk
+STREAM_STALL_TIMEOUT = 3.0   # Seconds without new audio before falling back to buffered synthesis
+
+# TTS cache configuration
+TTS_CACHE_FOLDER = "tts_cache" # Synthesized audio is kept here across restarts
+TTS_CACHE_MAX_BYTES = 256 * 1024 * 1024 # Least recently used clips are evicted past this size
+TTS_CACHE_HOT_MAX_BYTES = 16 * 1024 * 1024 # In-memory tier for the most recently used clips
+TTS_CACHE_RESCAN_SECONDS = 30.0 # Content workers share the folder; each re-reads its size at most this often before evicting
+
+# Azure synthesizer pool configuration
+SYNTH_POOL_SIZE = 3 # Long-lived synthesizers (and synthesis executor threads)
+SYNTH_CONNECT_TIMEOUT = 5.0 # Seconds to wait for a synthesizer connection to open
+SYNTH_LEASE_TIMEOUT = 10.0 # Seconds to wait for an idle pooled synthesizer before the call fails
+SYNTH_HEALTH_CHECK_INTERVAL = 30.0 # Seconds between reconnect sweeps over idle synthesizers
 
 # Reddit configuration
 TARGET_SUBREDDIT = "LivestreamFail"
-POST_LIMIT = 5 # Number of top posts to fetch
+POST_LIMIT = 5 # Number of new posts to react to per segment
+POST_SCAN_LIMIT = 25 # Number of top posts scanned for ones Pixel hasn't covered yet
+POST_INDEX_DB = "post_index.sqlite3" # Remembers seen posts and their reactions across restarts
+POST_INDEX_TTL_SECONDS = 3 * 24 * 60 * 60 # Forget posts after this long (top posts are only fetched per day)
 # FETCH_INTERVAL_SECONDS = 60 * 60 # Fetch every hour (3600 seconds)
 FETCH_INTERVAL_SECONDS = 300 # Use short interval for testing
 
+# Segment compiler configuration
+SEGMENT_COMPILER_ENABLED = False # Render LSF segments into gapless buffers instead of queueing items separately (airs a few seconds later)
+SEGMENT_CROSSFADE_SECONDS = 0.4 # The intro fades in over the tail of the stinger
+SEGMENT_GAP_SECONDS = 0.35      # Pause between spoken lines, after their own silence is trimmed
+SEGMENT_EDGE_SECONDS = 0.02     # Audio kept (and faded) either side of a trimmed line, so cuts don't click
+SEGMENT_SILENCE_THRESHOLD = 300 # 16-bit sample amplitude at or below which audio counts as silence
+LSF_INTRO_TEXT = "Hold up, hold up! We got some breaking TEA coming in hot! Let's get riiiight into the drama!"
+
+# Audio scheduler configuration
+QUEUE_MAX_ITEMS = 40 # Queued audio tasks before chat/filler requests are turned away
+QUEUE_MAX_TEXT_BYTES = 64 * 1024 # Queued TTS text before chat/filler requests are turned away
+CHAT_QUEUE_MAX_ITEMS = 8 # Chat requests waiting at once
+CHAT_MAX_WAIT_SECONDS = 120 # Chat requests waiting longer than this are dropped instead of played
+FILLER_MAX_WAIT_SECONDS = 60 # Same for filler
+CHAT_USER_RATE_SECONDS = 30 # Each user earns one chat request per this many seconds...
+CHAT_USER_BURST = 2 # ...and can save up this many
+CHAT_GLOBAL_RATE_PER_MINUTE = 6 # Chat requests accepted per minute across all users
+QUEUE_WAIT_SAMPLES = 500 # Recent queue waits kept for percentile stats
+
+# Multi-process configuration
+MULTIPROCESS_WORKERS = 0 # Content worker processes (fetch -> react -> synthesize); 0 runs everything in this process
+MP_SLOT_COUNT = 8 # Shared-memory PCM slots between workers and the audio process (bounds how far ahead workers run)
+MP_SLOT_BYTES = 8 * 1024 * 1024 # Per slot: ~170s of 24 kHz 16-bit mono audio
+MP_SLOT_WAIT_SECONDS = 120.0 # A worker gives up on a job after waiting this long for a free slot
+MP_JOB_RETRIES = 1 # Times a job is retried on another worker after the one running it crashed
+MP_SUPERVISOR_INTERVAL = 1.0 # Seconds between liveness checks of the worker and audio processes
+MP_JOB_TIMEOUT_SECONDS = 300.0 # A submitted job that has not come back by then fails, so a lost job never hangs its caller
+
+# Metrics configuration
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108 # Serves Prometheus text format at http://METRICS_HOST:METRICS_PORT/metrics (None to disable)
+METRICS_TRACE_FILE = None # e.g. "trace.jsonl" to also write one JSON line per timing span
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120) # Histogram bounds (seconds)
+
+# Startup configuration
+CLIENT_READY_TIMEOUT = 30.0 # Seconds a caller waits for a network client that is still starting up
+CLIENT_RETRY_SECONDS = 60.0 # A client that failed to start is retried on first use after this long
+
+# Gemini configuration
+GEMINI_MAX_CONCURRENCY = 3  # Reactions generated in parallel for one LSF segment
+GEMINI_CALL_TIMEOUT = 20.0  # Seconds before a single reaction call gives up and uses the fallback line
+GEMINI_BATCH_MODE = False   # Ask for all of a segment's reactions in one call (falls back to per-title calls)
+GEMINI_BATCH_TIMEOUT = 45.0 # Seconds before a batched call gives up
+
+# Multi-station configuration
+DEFAULT_STATION_NAME = "pixel" # The station on TWITCH_CHANNEL (keys its rows in the seen-post index)
+STATIONS = [] # More stations hosted by this process, one dict each: "name" and "channel" are required; "subreddit",
+              # "persona", "voice", "intro" and "sink" (a SOFTWARE_MIXER_SINK spec, default "pipe:<name>.pcm") are optional
+STATION_GENERATION_SLOTS = 6 # Gemini calls in flight at once across all stations, handed out fairly
+STATION_FETCH_SHARE_SECONDS = 60 # Stations on the same subreddit reuse one Reddit fetch for this long
+
 # --- Validate Configuration ---
-# (Add checks for all credentials)
-if not reddit_client_id or not reddit_client_secret or not reddit_user_agent or not reddit_username or not reddit_password:
-     print("ERROR: Missing Reddit API credentials in environment variables."); exit()
+# Everything is checked and reported together; a missing service is disabled instead of stopping the station
+reddit_configured = bool(reddit_client_id and reddit_client_secret and reddit_user_agent and reddit_username and reddit_password)
+gemini_configured = bool(gemini_api_key)
+azure_configured = bool(speech_key and speech_region)
+if not reddit_configured: print("ERROR: Missing Reddit API credentials in environment variables. LSF segments are disabled.")
+if not speech_key: print("ERROR: AZURE_SPEECH_KEY not found. Speech is disabled.")
+if not speech_region: print("ERROR: AZURE_SPEECH_REGION not found. Speech is disabled.")
+if not gemini_configured: print("ERROR: GEMINI_API_KEY not found. Pixel will use fallback lines.")
+if not os.path.isdir(MUSIC_FOLDER) or not os.listdir(MUSIC_FOLDER): print(f"ERROR: Music folder '{MUSIC_FOLDER}' missing or empty. No background music.")
+if not os.path.isfile(DRAMA_STINGER_SFX): print(f"ERROR: Drama stinger SFX file '{DRAMA_STINGER_SFX}' not found.")
 if not twitch_token or not twitch_nickname or not twitch_channel:
     print("ERROR: Missing Twitch credentials in environment variables."); exit()
-if not speech_key: print("ERROR: AZURE_SPEECH_KEY not found."); exit()
-if not speech_region: print("ERROR: AZURE_SPEECH_REGION not found."); exit()
-if not gemini_api_key: print("ERROR: GEMINI_API_KEY not found."); exit()
-if not os.path.isdir(MUSIC_FOLDER) or not os.listdir(MUSIC_FOLDER): print(f"ERROR: Music folder '{MUSIC_FOLDER}' missing or empty."); exit()
-if not os.path.isfile(DRAMA_STINGER_SFX): print(f"ERROR: Drama stinger SFX file '{DRAMA_STINGER_SFX}' not found."); exit()
 
 
-# --- Initialize Pygame Mixer ---
-try:
-    pygame.mixer.init(frequency=AZURE_AUDIO_FREQUENCY, size=AZURE_AUDIO_FORMAT_BITS, channels=AZURE_AUDIO_CHANNELS)
-    pygame.mixer.music.set_volume(MUSIC_VOLUME_NORMAL)
-    print(f"Pygame mixer initialized successfully (Freq: {AZURE_AUDIO_FREQUENCY}). Volume: {MUSIC_VOLUME_NORMAL}")
-except Exception as e: print(f"Error initializing pygame mixer: {e}"); exit()
+# --- Metrics ---
+class StationMetrics:
+    """Per-stage timing histograms, counters and gauges, exposed in Prometheus text format.
+
+    Recording is a dict update under a lock, so it is cheap enough for the audio path; trace lines
+    are handed to a background writer thread rather than written inline. Safe to use from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {} # (name, labels) -> [bucket counts..., sum, count]
+        self._counters = {}   # (name, labels) -> value
+        self._gauges = {}     # name -> callable returning the current value
+        self._trace_queue = None
+        self._server = None
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, stage, seconds, task_id=None, **labels):
+        """Records one timing for a pipeline stage (fetch, generate, synthesize, decode, queue_wait, playback...)."""
+        labels["stage"] = stage
+        key = self._key("kappacore_stage_seconds", labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None: histogram = self._histograms[key] = [0] * (len(METRICS_BUCKETS) + 2)
+            for i, bound in enumerate(METRICS_BUCKETS):
+                if seconds <= bound: histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+        if self._trace_queue is not None:
+            self._trace_queue.put({"ts": time.time(), "task": task_id, "seconds": round(seconds, 6), **labels})
+
+    @contextmanager
+    def span(self, stage, task_id=None, **labels):
+        """Context manager timing the enclosed block as one stage."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started_at, task_id, **labels)
+
+    def inc(self, name, amount=1, **labels):
+        """Adds to a counter (cache hits, fallbacks, cancellations, dead air seconds...)."""
+        key = self._key(f"kappacore_{name}_total", labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def take_snapshot(self):
+        """Returns and clears the histograms and counters recorded so far, for a child process to forward to merge()."""
+        with self._lock:
+            snapshot = (self._histograms, self._counters)
+            self._histograms, self._counters = {}, {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Adds a child process's take_snapshot() to these metrics, so /metrics covers every process."""
+        histograms, counters = snapshot
+        with self._lock:
+            for key, histogram in histograms.items():
+                merged = self._histograms.setdefault(key, [0] * len(histogram))
+                for i, value in enumerate(histogram): merged[i] += value
+            for key, value in counters.items(): self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name, read_value):
+        """Registers a gauge whose value is read when metrics are scraped."""
+        self._gauges[f"kappacore_{name}"] = read_value
+
+    def render(self):
+        """Returns all metrics in Prometheus text exposition format."""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+        lines = []
+        with self._lock:
+            histograms = {key: list(value) for key, value in self._histograms.items()}
+            counters = dict(self._counters)
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (_, labels), histogram in sorted(item for item in histograms.items() if item[0][0] == name):
+                for bound, bucket_count in zip(METRICS_BUCKETS, histogram):
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {bucket_count}")
+                lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {histogram[-1]}")
+                lines.append(f"{name}_sum{label_text(labels)} {histogram[-2]:.6f}")
+                lines.append(f"{name}_count{label_text(labels)} {histogram[-1]}")
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (_, labels), value in sorted(item for item in counters.items() if item[0][0] == name):
+                lines.append(f"{name}{label_text(labels)} {value:g}")
+        for name, read_value in sorted(self._gauges.items()):
+            try: value = read_value()
+            except Exception: continue
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def start_trace(self, path):
+        """Starts writing one JSON line per observed span to path."""
+        if self._trace_queue is not None or not path: return
+        self._trace_queue = queue.Queue()
+        def write_trace():
+            with open(path, "a", encoding="utf-8") as trace_file:
+                while True:
+                    trace_file.write(json.dumps(self._trace_queue.get()) + "\n")
+                    if self._trace_queue.empty(): trace_file.flush()
+        threading.Thread(target=write_trace, name="metrics-trace", daemon=True).start()
+        print(f"Writing timing trace to {path}")
+
+    def start_server(self, host, port):
+        """Serves /metrics over HTTP from a background thread."""
+        if self._server is not None or port is None: return
+        metrics = self
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Keep scrapes out of the console
+        try:
+            self._server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e: print(f"WARN: Could not start metrics endpoint on {host}:{port}: {e}"); return
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"Metrics available at http://{host}:{port}/metrics")
+
+metrics = StationMetrics()
+
+# --- Startup Timing & Background Clients ---
+class StartupTimer:
+    """Times each startup phase (offsets are from module load) and prints a summary once everything is up."""
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases = [] # (name, started offset, seconds, error)
+        self.audible_after = None
+
+    @contextmanager
+    def phase(self, name):
+        started_at = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            seconds = time.perf_counter() - started_at
+            with self._lock: self.phases.append((name, started_at - self._origin, seconds, error))
+            metrics.observe("startup", seconds, phase=name)
+
+    def mark_audible(self):
+        self.audible_after = time.perf_counter() - self._origin
+        print(f"Station audible {self.audible_after * 1000:.0f} ms after load.")
+
+    def report(self):
+        with self._lock: phases = sorted(self.phases, key=lambda phase: phase[1])
+        print("Startup phases:")
+        for name, offset, seconds, error in phases:
+            print(f"  {name:<18} +{offset * 1000:6.0f} ms  took {seconds * 1000:6.0f} ms{f'  FAILED: {error}' if error else ''}")
+        if self.audible_after is not None: print(f"  audible after {self.audible_after * 1000:.0f} ms")
+
+startup = StartupTimer()
+
+class ServiceClient:
+    """A network client created on a background thread, so startup never waits on the network.
+
+    get() blocks (up to CLIENT_READY_TIMEOUT) until the client is ready and raises if it couldn't be
+    created; callers already run in executors and fall back through their usual error handling.
+    A failed client is retried on first use once CLIENT_RETRY_SECONDS have passed.
+    """
+
+    def __init__(self, name, create, configured=True):
+        self.name = name
+        self._create = create
+        self._configured = configured
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._started = False
+        self._client = None
+        self._error = None if configured else RuntimeError(f"{name} is not configured")
+        self._failed_at = 0.0
+
+    def start(self):
+        """Starts creating the client in the background (no-op if already started or not configured)."""
+        with self._lock:
+            retry_due = self._started and self._client is None and self._ready.is_set() \
+                and time.perf_counter() - self._failed_at >= CLIENT_RETRY_SECONDS
+            if not self._configured or (self._started and not retry_due): return
+            self._started = True
+            self._ready.clear()
+        threading.Thread(target=self._run, name=f"init-{self.name}", daemon=True).start()
+
+    def _run(self):
+        try:
+            with startup.phase(self.name):
+                client = self._create()
+            self._client, self._error = client, None
+        except Exception as e:
+            print(f"Error initializing {self.name} client: {e}")
+            self._error, self._failed_at = e, time.perf_counter()
+        finally:
+            self._ready.set()
+
+    def get(self, timeout=CLIENT_READY_TIMEOUT):
+        """Returns the client, waiting for it to finish starting up."""
+        self.start()
+        if not self._configured: raise self._error
+        if not self._ready.wait(timeout): raise TimeoutError(f"{self.name} client is still starting up")
+        if self._client is None: raise RuntimeError(f"{self.name} client unavailable: {self._error}")
+        return self._client
+
+    def peek(self):
+        """Returns the client if it is ready, otherwise None. Never blocks."""
+        return self._client
+
+    def wait_ready(self, timeout=None):
+        return not self._configured or self._ready.wait(timeout)
+
+    def status(self):
+        if self._client is not None: return f"{self.name}: ready"
+        if not self._configured: return f"{self.name}: not configured"
+        if self._error is not None: return f"{self.name}: failed ({self._error})"
+        return f"{self.name}: starting"
+
+# --- Audio Engine ---
+_reserved_channels = 0 # pygame channels handed out by reserve_channel(), numbered from 0
+_reserved_channels_lock = threading.Lock()
+
+def reserve_channel():
+    """Returns a pygame channel nobody else owns (the AudioEngine's speech channel, each device sink's output)."""
+    global _reserved_channels
+    with _reserved_channels_lock:
+        index = _reserved_channels
+        _reserved_channels += 1
+        if pygame.mixer.get_num_channels() < _reserved_channels: pygame.mixer.set_num_channels(_reserved_channels)
+        pygame.mixer.set_reserved(_reserved_channels) # Keep them out of Sound.play()'s automatic picks
+    return pygame.mixer.Channel(index)
+
+class AudioEngine:
+    """Owns all pygame.mixer playback from a dedicated audio thread, bridged into asyncio.
+
+    Speech/SFX are played back-to-back on a reserved channel using Channel.queue, so the next item
+    starts the instant the previous one ends. Completion is reported through asyncio futures, the
+    next music track starts as soon as the current one ends, and ducking uses volume ramps.
+    Nothing here ever blocks the event loop.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._running = False
+        self._commands = queue.Queue() # Callables run on the audio thread
+        self._pending = deque()        # (sound, started_future, finished_future) waiting for the channel
+        self._on_channel = deque()     # Entries handed to the channel: [playing, queued]
+        self._speech_channel = None
+        self._next_track = None        # Callable that loads and starts the next music track
+        self._music_volume = MUSIC_VOLUME_NORMAL
+        self._music_target = MUSIC_VOLUME_NORMAL
+        self._idle_since = None
+        self._duck_holds = 0           # hold_duck() calls not yet released
+        self._music_retry_at = 0.0
+        self._last_tick = time.perf_counter()
+        self._last_dead_air_check = time.perf_counter()
+
+    def start(self):
+        if self._running: return
+        self._running = True
+        self._last_tick = self._last_dead_air_check = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="audio-engine", daemon=True)
+        self._thread.start()
+        print("Audio engine started.")
+
+    def stop(self):
+        self._running = False
+        if self._thread: self._thread.join(timeout=1)
+
+    # --- Called from the event loop ---
+
+    def play(self, sound_object):
+        """Queues a Sound behind anything already playing. Returns (started, finished) asyncio futures."""
+        loop = asyncio.get_running_loop()
+        started, finished = loop.create_future(), loop.create_future()
+        self._commands.put(lambda: self._pending.append((sound_object, started, finished)))
+        return started, finished
+
+    def start_music(self, next_track):
+        """Starts background music; next_track() is called on the audio thread whenever a track ends."""
+        def enable():
+            self._next_track = next_track
+        self._commands.put(enable)
+
+    def hold_duck(self):
+        """Keeps the music ducked, even while no speech is playing, until the matching release_duck()."""
+        def hold():
+            self._duck_holds += 1
+            self._music_target = MUSIC_VOLUME_LOW
+        self._commands.put(hold)
+
+    def release_duck(self):
+        def release():
+            self._duck_holds -= 1
+            self._idle_since = None # Unduck UNDUCK_DELAY_SECONDS from now, as after the last item
+        self._commands.put(release)
+
+    def is_idle(self):
+        return not self._pending and not self._on_channel
+
+    def music_playing(self):
+        return pygame.mixer.music.get_busy()
+
+    # --- Audio thread ---
+
+    def _resolve(self, future, value=None):
+        future.get_loop().call_soon_threadsafe(lambda: future.done() or future.set_result(value))
+
+    def _run(self):
+        self._speech_channel = reserve_channel() # Speech/SFX only
+        while self._running:
+            try:
+                command = self._commands.get(timeout=AUDIO_ENGINE_TICK)
+                command()
+                continue # Drain all pending commands before servicing
+            except queue.Empty: pass
+            try:
+                self._service_speech()
+                self._service_music()
+                self._service_volume()
+                self._account_dead_air()
+            except Exception as e:
+                print(f"Error in audio engine: {e}")
+                time.sleep(0.5)
+
+    def _service_speech(self):
+        channel = self._speech_channel
+        # Retire entries the channel has finished with
+        if len(self._on_channel) == 2 and (channel.get_queue() is None or not channel.get_busy()):
+            self._resolve(self._on_channel.popleft()[2])
+            self._resolve(self._on_channel[0][1]) # Queued entry is now playing
+        if len(self._on_channel) == 1 and not channel.get_busy():
+            self._resolve(self._on_channel.popleft()[2])
+
+        if self._pending:
+            self._idle_since = None
+            self._music_target = MUSIC_VOLUME_LOW
+            # Let the duck ramp finish before the first item of a block starts
+            if not self._on_channel and self._music_volume <= MUSIC_VOLUME_LOW + 0.01:
+                entry = self._pending.popleft()
+                channel.play(entry[0])
+                self._on_channel.append(entry)
+                self._resolve(entry[1])
+            if len(self._on_channel) == 1 and self._pending and channel.get_queue() is None:
+                entry = self._pending.popleft()
+                channel.queue(entry[0]) # Starts the moment the playing entry ends
+                self._on_channel.append(entry)
+        elif not self._on_channel and self._music_target != MUSIC_VOLUME_NORMAL and not self._duck_holds:
+            if self._idle_since is None: self._idle_since = time.perf_counter()
+            elif time.perf_counter() - self._idle_since >= UNDUCK_DELAY_SECONDS:
+                self._music_target = MUSIC_VOLUME_NORMAL
+
+    def _account_dead_air(self):
+        """Counts silence on the speech channel while speech is waiting or the music is ducked, and any time nothing plays at all."""
+        now = time.perf_counter()
+        elapsed, self._last_dead_air_check = now - self._last_dead_air_check, now
+        if self._on_channel: return
+        if self._pending or self._music_target != MUSIC_VOLUME_NORMAL or not pygame.mixer.music.get_busy():
+            metrics.inc("dead_air_seconds", elapsed)
+
+    def _service_music(self):
+        if not self._next_track or pygame.mixer.music.get_busy() or time.perf_counter() < self._music_retry_at: return
+        self._next_track()
+        pygame.mixer.music.set_volume(self._music_volume) # Loading a track resets its volume
+        if not pygame.mixer.music.get_busy():
+            self._music_retry_at = time.perf_counter() + 10 # Nothing playable; don't retry every tick
+
+    def _service_volume(self):
+        now = time.perf_counter()
+        elapsed, self._last_tick = now - self._last_tick, now
+        if self._music_volume == self._music_target: return
+        ramp_seconds = DUCK_RAMP_SECONDS if self._music_target < self._music_volume else UNDUCK_RAMP_SECONDS
+        step = (MUSIC_VOLUME_NORMAL - MUSIC_VOLUME_LOW) * elapsed / ramp_seconds
+        if self._music_target < self._music_volume:
+            self._music_volume = max(self._music_target, self._music_volume - step)
+        else:
+            self._music_volume = min(self._music_target, self._music_volume + step)
+        pygame.mixer.music.set_volume(self._music_volume)
+
+audio_engine = AudioEngine() # Replaced by a SoftwareMixer when AUDIO_BACKEND is "software"
+
+# --- Software Mixer ---
+class SoftwareMixer:
+    """Headless alternative to AudioEngine that mixes music, speech and SFX itself, in NumPy blocks.
+
+    Music ducking follows a per-sample gain envelope, speech items are joined sample-accurately, and
+    a peak limiter keeps the sum out of clipping. The mix is written to a PCM sink at
+    SOFTWARE_MIXER_SPEED times realtime (0 renders as fast as possible). Same interface as
+    AudioEngine; play() takes pygame Sounds (anything with get_raw()) in the mixer's format.
+    """
+
+    def __init__(self, sink, label=None):
+        self.sink = sink
+        self.label = label or SOFTWARE_MIXER_SINK
+        self._thread = None
+        self._running = False
+        self._commands = queue.Queue() # Callables run on the mixer thread
+        self._pending = deque()        # (samples, started_future, finished_future) waiting for the speech lane
+        self._speech = None            # [samples, position, finished_future] now playing
+        self._next_track = None        # Callable returning (name, samples) for the next music track
+        self._music = None             # [samples, position]
+        self._prefetched_track = None  # Future-like holder for the next decoded track
+        self._music_gain = MUSIC_VOLUME_NORMAL
+        self._music_target = MUSIC_VOLUME_NORMAL
+        self._idle_frames = 0          # Frames since the speech lane went quiet
+        self._duck_holds = 0           # hold_duck() calls not yet released
+        self._limiter_gain = 1.0
+        self.rendered_seconds = 0.0
+        self.dead_air_seconds = 0.0
+        self.limited_blocks = 0
+
+    def start(self):
+        if self._running: return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="software-mixer", daemon=True)
+        self._thread.start()
+        print(f"Software mixer started ({self.label}, {f'{SOFTWARE_MIXER_SPEED:g}x realtime' if SOFTWARE_MIXER_SPEED else 'unthrottled'}).")
+
+    def stop(self):
+        self._running = False
+        if self._thread: self._thread.join(timeout=1)
+        self.sink.close()
+
+    # --- Called from the event loop ---
+
+    def play(self, sound_object):
+        """Queues a Sound behind anything already playing. Returns (started, finished) asyncio futures."""
+        loop = asyncio.get_running_loop()
+        started, finished = loop.create_future(), loop.create_future()
+        self._commands.put(lambda: self._pending.append((np.frombuffer(sound_object.get_raw(), dtype=np.int16), started, finished)))
+        return started, finished
+
+    def start_music(self, next_track):
+        """Starts background music; next_track() returns (name, samples) and is called ahead of each track change."""
+        def enable():
+            self._next_track = next_track
+            self._prefetch_music()
+        self._commands.put(enable)
+
+    def hold_duck(self):
+        """Keeps the music ducked, even while no speech is playing, until the matching release_duck()."""
+        def hold():
+            self._duck_holds += 1
+        self._commands.put(hold)
+
+    def release_duck(self):
+        def release():
+            self._duck_holds -= 1
+        self._commands.put(release)
+
+    def is_idle(self):
+        return not self._pending and self._speech is None
+
+    def music_playing(self):
+        return self._music is not None
+
+    # --- Mixer thread ---
+
+    def _prefetch_music(self):
+        """Decodes the next track on a background thread so track changes never stall the mix."""
+        holder = self._prefetched_track = {}
+        def decode():
+            holder["track"] = self._next_track()
+        threading.Thread(target=decode, name="music-decode", daemon=True).start()
+
+    def _run(self):
+        block_seconds = SOFTWARE_MIXER_BLOCK_FRAMES / AZURE_AUDIO_FREQUENCY
+        next_block_at = time.perf_counter()
+        while self._running:
+            try:
+                while True: self._commands.get_nowait()()
+            except queue.Empty: pass
+            try:
+                self.sink.write(self._render_block().tobytes())
+            except Exception as e:
+                print(f"Error in software mixer: {e}")
+                time.sleep(0.5)
+            self.rendered_seconds += block_seconds
+            if SOFTWARE_MIXER_SPEED and not self.sink.paces_itself:
+                next_block_at += block_seconds / SOFTWARE_MIXER_SPEED
+                delay = next_block_at - time.perf_counter()
+                if delay > 0: time.sleep(delay)
+                elif delay < -0.5: next_block_at = time.perf_counter() # Fell far behind; don't burst to catch up
+
+    def _render_block(self):
+        frames = SOFTWARE_MIXER_BLOCK_FRAMES
+        mix = np.zeros(frames, dtype=np.float32)
+
+        # Duck while speech is playing, waiting or held down; come back up UNDUCK_DELAY_SECONDS after the last item
+        if self._speech is not None or self._pending or self._duck_holds:
+            self._music_target = MUSIC_VOLUME_LOW
+            self._idle_frames = 0
+        elif self._music_target != MUSIC_VOLUME_NORMAL:
+            self._idle_frames += frames
+            if self._idle_frames >= UNDUCK_DELAY_SECONDS * AZURE_AUDIO_FREQUENCY: self._music_target = MUSIC_VOLUME_NORMAL
+        envelope = self._music_envelope(frames)
+
+        # The first item of a run waits for the duck ramp to finish, to the sample
+        speech_from = 0
+        if self._speech is None and self._pending:
+            ducked = np.flatnonzero(envelope <= MUSIC_VOLUME_LOW + 1e-6)
+            speech_from = int(ducked[0]) if len(ducked) else frames
+        speech_idle_frames = self._mix_speech(mix, speech_from)
+        music_silent = self._mix_music(mix, envelope)
+
+        if speech_idle_frames and (self._pending or self._music_target != MUSIC_VOLUME_NORMAL or music_silent):
+            dead_air = speech_idle_frames / AZURE_AUDIO_FREQUENCY
+            self.dead_air_seconds += dead_air
+            metrics.inc("dead_air_seconds", dead_air)
+        return self._limit(mix)
+
+    def _music_envelope(self, frames):
+        """Per-sample music gain for this block, ramping linearly toward the current target."""
+        if self._music_gain == self._music_target: return np.full(frames, self._music_gain, dtype=np.float32)
+        ramp_seconds = DUCK_RAMP_SECONDS if self._music_target < self._music_gain else UNDUCK_RAMP_SECONDS
+        step = (MUSIC_VOLUME_NORMAL - MUSIC_VOLUME_LOW) / (ramp_seconds * AZURE_AUDIO_FREQUENCY)
+        ramp = np.arange(1, frames + 1, dtype=np.float32) * step
+        if self._music_target < self._music_gain: envelope = np.maximum(self._music_gain - ramp, self._music_target)
+        else: envelope = np.minimum(self._music_gain + ramp, self._music_target)
+        self._music_gain = float(envelope[-1])
+        return envelope
+
+    def _mix_speech(self, mix, position):
+        """Adds speech from frame `position` on, starting queued items back to back. Returns frames with no speech."""
+        idle_frames = position
+        while position < len(mix):
+            if self._speech is None:
+                if not self._pending: break
+                samples, started, finished = self._pending.popleft()
+                self._speech = [samples, 0, finished]
+                self._resolve(started)
+            samples, offset, finished = self._speech
+            count = min(len(mix) - position, len(samples) - offset)
+            mix[position:position + count] += samples[offset:offset + count]
+            position += count
+            self._speech[1] += count
+            if self._speech[1] >= len(samples):
+                self._speech = None
+                self._resolve(finished)
+        return idle_frames + len(mix) - position
+
+    def _mix_music(self, mix, envelope):
+        """Adds the music bed under the envelope, moving on to the pre-decoded next track mid-block. Returns True if there was none."""
+        position = 0
+        while position < len(mix):
+            if self._music is None:
+                holder = self._prefetched_track
+                if holder is None or "track" not in holder: return position == 0 # Still decoding; silence until it's ready
+                if holder["track"] is None: # Nothing playable; don't retry every block
+                    if time.perf_counter() >= holder.setdefault("retry_at", time.perf_counter() + 10): self._prefetch_music()
+                    return position == 0
+                name, samples = holder["track"]
+                print(f"\nPlaying music track: {name}")
+                self._music = [samples, 0]
+                self._prefetch_music()
+            samples, offset = self._music
+            count = min(len(mix) - position, len(samples) - offset)
+            mix[position:position + count] += samples[offset:offset + count] * envelope[position:position + count]
+            position += count
+            self._music[1] += count
+            if self._music[1] >= len(samples): self._music = None
+        return False
+
+    def _limit(self, mix):
+        """Peak limiter: instant attack, smooth release, then a hard clip as the last line of defence."""
+        peak = float(np.max(np.abs(mix)))
+        target = min(1.0, SOFTWARE_MIXER_LIMIT / peak) if peak else 1.0
+        if target < self._limiter_gain: gain = np.float32(target) # Attack within the block that needs it
+        else:
+            release = 1 - math.exp(-len(mix) / (SOFTWARE_MIXER_RELEASE_SECONDS * AZURE_AUDIO_FREQUENCY))
+            target = self._limiter_gain + (target - self._limiter_gain) * release
+            gain = np.linspace(self._limiter_gain, target, len(mix), dtype=np.float32)
+        self._limiter_gain = target
+        if target < 1.0: self.limited_blocks += 1
+        mix *= gain
+        return np.clip(mix, -32768, 32767).astype(np.int16)
+
+    @staticmethod
+    def _resolve(future):
+        future.get_loop().call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+# --- PCM Sinks ---
+class PygameDeviceSink:
+    """Plays the mix on the sound device through its own reserved pygame channel, queueing chunks back to back."""
+    paces_itself = True # write() blocks while the device is busy
+
+    def __init__(self):
+        self._channel = reserve_channel()
+        self._buffer = bytearray()
+        self._chunk_bytes = int(0.1 * AZURE_AUDIO_FREQUENCY) * 2
+
+    def write(self, pcm):
+        self._buffer += pcm
+        if len(self._buffer) < self._chunk_bytes: return
+        sound_object = pygame.mixer.Sound(buffer=bytes(self._buffer))
+        self._buffer.clear()
+        while self._channel.get_queue() is not None: time.sleep(0.002)
+        if self._channel.get_busy(): self._channel.queue(sound_object)
+        else: self._channel.play(sound_object)
 
-# --- Initialize Reddit Client (PRAW) ---
-try:
+    def close(self):
+        self._channel.stop()
+
+class WavFileSink:
+    """Writes the mix to a WAV file."""
+    paces_itself = False
+
+    def __init__(self, path):
+        self._wav_file = wave.open(path, 'wb')
+        self._wav_file.setnchannels(AZURE_AUDIO_CHANNELS)
+        self._wav_file.setsampwidth(abs(AZURE_AUDIO_FORMAT_BITS) // 8)
+        self._wav_file.setframerate(AZURE_AUDIO_FREQUENCY)
+
+    def write(self, pcm):
+        self._wav_file.writeframes(pcm)
+
+    def close(self):
+        self._wav_file.close()
+
+class PipeSink:
+    """Writes raw PCM (s16le, mono) to a named pipe, creating it if needed, e.g. for `ffmpeg -f s16le -ar 24000 -ac 1 -i <pipe>`.
+    The mix is dropped while no reader is connected (opening never blocks the mixer thread), and a reader can come and go."""
+    paces_itself = False
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._next_open_at = 0.0
+
+    def _open(self):
+        if time.perf_counter() < self._next_open_at: return
+        self._next_open_at = time.perf_counter() + PIPE_SINK_RETRY_SECONDS
+        if not os.path.exists(self.path): os.mkfifo(self.path)
+        try: fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK) # Fails with ENXIO instead of waiting for a reader
+        except OSError: return
+        os.set_blocking(fd, True) # Whole writes, so a slow reader never gets a torn sample
+        self._file = os.fdopen(fd, 'wb')
+        print(f"PCM pipe reader connected to {self.path}.")
+
+    def write(self, pcm):
+        if self._file is None: self._open()
+        if self._file is None: return
+        try:
+            self._file.write(pcm)
+        except BrokenPipeError:
+            print(f"PCM pipe reader disconnected from {self.path}.")
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            try: self._file.close()
+            except BrokenPipeError: pass
+            self._file = None
+
+class StdoutSink:
+    """Writes raw PCM (s16le, mono) to stdout for an encoder; print() output is moved to stderr."""
+    paces_itself = False
+
+    def __init__(self):
+        self._file = sys.stdout.buffer
+        sys.stdout = sys.stderr # Keep log lines out of the audio stream
+
+    def write(self, pcm):
+        self._file.write(pcm)
+        self._file.flush()
+
+    def close(self):
+        pass
+
+class NullSink:
+    """Discards the mix (for timing runs)."""
+    paces_itself = False
+
+    def write(self, pcm):
+        pass
+
+    def close(self):
+        pass
+
+def open_pcm_sink(spec):
+    """Creates the sink named by SOFTWARE_MIXER_SINK: "device", "wav:<path>", "pipe:<path>", "stdout" or "null"."""
+    kind, _, target = spec.partition(":")
+    if kind == "device": return PygameDeviceSink()
+    if kind == "wav": return WavFileSink(target)
+    if kind == "pipe": return PipeSink(target)
+    if kind == "stdout": return StdoutSink()
+    if kind == "null": return NullSink()
+    raise ValueError(f"Unknown SOFTWARE_MIXER_SINK {spec!r}")
+
+# --- Sound Bank & Music Library ---
+def sound_nbytes(sound_object):
+    """Approximate decoded size of a pygame Sound in bytes (for memory budgets)."""
+    return int(sound_object.get_length() * AZURE_AUDIO_FREQUENCY * AZURE_AUDIO_CHANNELS * abs(AZURE_AUDIO_FORMAT_BITS) // 8)
+
+class SoundBank:
+    """Keeps decoded SFX resident in memory (least recently used evicted past max_bytes)."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sounds = OrderedDict() # path -> (sound_object, nbytes), least recently used first
+        self._bytes = 0
+
+    def get_resident(self, path):
+        """Returns the decoded Sound for path if it's already resident, without touching the disk."""
+        with self._lock:
+            entry = self._sounds.get(path)
+            if entry is None: return None
+            self._sounds.move_to_end(path)
+            return entry[0]
+
+    def load(self, path):
+        """Returns the decoded Sound for path, decoding it from disk on a miss. None if it can't be loaded."""
+        sound_object = self.get_resident(path)
+        if sound_object is not None: return sound_object
+        if not os.path.exists(path): print(f"ERROR: SFX file not found: {path}"); return None
+        try:
+            sound_object = pygame.mixer.Sound(path)
+        except Exception as e: print(f"Error loading SFX into pygame: {e}"); return None
+        nbytes = sound_nbytes(sound_object)
+        with self._lock:
+            if path not in self._sounds:
+                self._sounds[path] = (sound_object, nbytes)
+                self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._sounds) > 1:
+                _, (_, evicted_bytes) = self._sounds.popitem(last=False)
+                self._bytes -= evicted_bytes
+        print(f"Sound bank loaded {path} ({sound_object.get_length():.2f}s, {self._bytes / (1024 * 1024):.1f} MB resident).")
+        return sound_object
+
+class MusicLibrary:
+    """Index of the music folder with shuffle-without-repeat and the next track pre-buffered in memory.
+
+    The folder is rescanned incrementally (by file mtime) on a background thread, so picking and
+    loading the next track costs no disk I/O on the audio thread.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._tracks = {} # file name -> mtime
+        self._shuffle_bag = []
+        self._last_played = None
+        self._next = None # (file name, bytes) pre-buffered for the next take_next()
+        self.rescan()
+        self._prebuffer_next()
+
+    def rescan(self):
+        """Updates the index from the folder, touching only files that were added, removed or changed."""
+        try:
+            current = {entry.name: entry.stat().st_mtime for entry in os.scandir(self.folder) if entry.is_file()}
+        except OSError as e: print(f"Error scanning music folder: {e}"); return
+        with self._lock:
+            added = current.keys() - self._tracks.keys()
+            removed = self._tracks.keys() - current.keys()
+            changed = {name for name in current.keys() & self._tracks.keys() if current[name] != self._tracks[name]}
+            self._tracks = current
+            if removed or changed:
+                self._shuffle_bag = [name for name in self._shuffle_bag if name in current]
+                if self._next and self._next[0] in removed | changed: self._next = None
+            self._shuffle_bag.extend(added) # New tracks join the current shuffle round
+        if added or removed or changed:
+            print(f"Music library: {len(current)} tracks ({len(added)} added, {len(removed)} removed, {len(changed)} changed).")
+
+    def _pick(self):
+        with self._lock:
+            if not self._shuffle_bag:
+                self._shuffle_bag = list(self._tracks)
+                random.shuffle(self._shuffle_bag)
+                # Don't repeat the last track across a reshuffle
+                if len(self._shuffle_bag) > 1 and self._shuffle_bag[-1] == self._last_played:
+                    self._shuffle_bag[0], self._shuffle_bag[-1] = self._shuffle_bag[-1], self._shuffle_bag[0]
+            return self._shuffle_bag.pop() if self._shuffle_bag else None
+
+    def _prebuffer_next(self):
+        track_name = self._pick()
+        if track_name is None: return
+        try:
+            with open(os.path.join(self.folder, track_name), "rb") as track_file:
+                track_bytes = track_file.read()
+        except OSError as e: print(f"Error pre-buffering music track {track_name}: {e}"); return
+        with self._lock:
+            self._next = (track_name, track_bytes)
+
+    def take_next(self):
+        """Returns (file name, in-memory file) for the next track and starts pre-buffering the one after it."""
+        with self._lock:
+            next_track, self._next = self._next, None
+        if next_track is None: # Pre-buffering hasn't caught up (or failed); read it now
+            self._prebuffer_next()
+            with self._lock:
+                next_track, self._next = self._next, None
+            if next_track is None: return None, None
+        self._last_played = next_track[0]
+        threading.Thread(target=self._prebuffer_next, name="music-prebuffer", daemon=True).start()
+        return next_track[0], io.BytesIO(next_track[1])
+
+    def start_rescanning(self, interval):
+        def rescan_loop():
+            while True:
+                time.sleep(interval)
+                self.rescan()
+        threading.Thread(target=rescan_loop, name="music-rescan", daemon=True).start()
+
+sound_bank = SoundBank(SOUND_BANK_MAX_BYTES)
+music_library = LazyInstance("music library", lambda: MusicLibrary(MUSIC_FOLDER)) # Built by the process that plays the music
+
+# --- Reddit Client (PRAW) ---
+def create_reddit_client():
+    with startup.phase("reddit import"): praw.load()
     reddit = praw.Reddit(
         client_id=reddit_client_id,
         client_secret=reddit_client_secret,
@@ -79,71 +1049,666 @@ try:
         password=reddit_password,
         check_for_async=False # Keep sync for executor calls
     )
-    subreddit_display_name = reddit.subreddit(TARGET_SUBREDDIT).display_name
+    subreddit_display_name = reddit.subreddit(TARGET_SUBREDDIT).display_name # Authenticates ahead of the first fetch
     print(f"PRAW initialized successfully. Connected to r/{subreddit_display_name}.")
-except Exception as e:
-    print(f"Error initializing PRAW Reddit client: {e}")
-    exit()
+    return reddit
+
+reddit_client = ServiceClient("reddit", create_reddit_client, reddit_configured)
 
-# --- Configure Gemini ---
-try:
+# --- Gemini Client ---
+def create_gemini_model():
+    with startup.phase("gemini import"): genai.load()
     genai.configure(api_key=gemini_api_key)
     gemini_model = genai.GenerativeModel('gemini-1.5-flash-latest')
     print("Gemini AI configured successfully.")
-except Exception as e: print(f"Error configuring Gemini AI: {e}"); exit()
+    return gemini_model
+
+gemini_client = ServiceClient("gemini", create_gemini_model, gemini_configured)
+
+# --- Azure Synthesizer Pool ---
+class PooledSynthesizer:
+    """A long-lived SpeechSynthesizer with its own pre-opened service connection."""
+
+    def __init__(self, index, speech_config):
+        self.index = index
+        self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        self.connection = speechsdk.Connection.from_speech_synthesizer(self.synthesizer)
+        self.connected = threading.Event()
+        self.connection.connected.connect(lambda evt: self.connected.set())
+        self.connection.disconnected.connect(lambda evt: self.connected.clear())
+
+    def ensure_connected(self):
+        """Opens the connection if it isn't open. Returns the seconds spent connecting (0 when warm)."""
+        if self.connected.is_set(): return 0.0
+        started_at = time.perf_counter()
+        self.connection.open(True)
+        if not self.connected.wait(SYNTH_CONNECT_TIMEOUT):
+            print(f"WARN: Synthesizer #{self.index} did not connect within {SYNTH_CONNECT_TIMEOUT}s.")
+        return time.perf_counter() - started_at
+
+class SynthesizerPool:
+    """Fixed pool of pre-connected Azure synthesizers, so warm utterances skip construction and TLS setup.
+
+    Synthesizers are leased one call at a time; a background sweep reconnects idle ones that dropped.
+    """
+
+    def __init__(self, size, speech_config):
+        self.size = size
+        self._condition = threading.Condition()
+        self._idle = []
+        self.calls = 0
+        self.warm_calls = 0
+        self.connect_seconds = 0.0
+        self.synthesis_seconds = 0.0
+
+        started_at = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=size) as warmup_executor:
+            entries = list(warmup_executor.map(lambda index: PooledSynthesizer(index, speech_config), range(size)))
+            list(warmup_executor.map(PooledSynthesizer.ensure_connected, entries))
+        self._idle.extend(entries)
+        print(f"Azure synthesizer pool ready: {sum(e.connected.is_set() for e in entries)}/{size} connected in {time.perf_counter() - started_at:.2f}s.")
+
+        threading.Thread(target=self._health_check_loop, name="tts-pool-health", daemon=True).start()
+
+    @contextmanager
+    def lease(self):
+        """Context manager yielding a connected SpeechSynthesizer for one call, recording connect vs synthesis time.
 
-# --- Configure Azure AI Speech ---
-try:
+        Raises TimeoutError if no synthesizer frees up within SYNTH_LEASE_TIMEOUT.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._idle, SYNTH_LEASE_TIMEOUT):
+                metrics.inc("fallbacks", stage="lease")
+                raise TimeoutError(f"no idle synthesizer within {SYNTH_LEASE_TIMEOUT}s")
+            entry = self._idle.pop()
+        try:
+            connect_seconds = entry.ensure_connected()
+            metrics.observe("connect", connect_seconds)
+            started_at = time.perf_counter()
+            yield entry.synthesizer
+            synthesis_seconds = time.perf_counter() - started_at
+            with self._condition:
+                self.calls += 1
+                self.warm_calls += connect_seconds == 0.0
+                self.connect_seconds += connect_seconds
+                self.synthesis_seconds += synthesis_seconds
+            print(f"Synthesizer #{entry.index} ({'warm' if connect_seconds == 0.0 else 'cold'}): "
+                  f"connect {connect_seconds * 1000:.0f} ms, synthesis {synthesis_seconds * 1000:.0f} ms.")
+        except Exception:
+            entry.connected.clear() # Force a fresh connection before this synthesizer is used again
+            raise
+        finally:
+            with self._condition:
+                self._idle.append(entry)
+                self._condition.notify()
+
+    def _health_check_loop(self):
+        while True:
+            time.sleep(SYNTH_HEALTH_CHECK_INTERVAL)
+            with self._condition:
+                dropped = [entry for entry in self._idle if not entry.connected.is_set()]
+                for entry in dropped: self._idle.remove(entry)
+            for entry in dropped:
+                try:
+                    print(f"Reconnecting dropped synthesizer #{entry.index}...")
+                    entry.ensure_connected()
+                except Exception as e: print(f"Error reconnecting synthesizer #{entry.index}: {e}")
+                finally:
+                    with self._condition:
+                        self._idle.append(entry)
+                        self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            if not self.calls: return "Synthesizer pool: no calls yet"
+            return (f"Synthesizer pool: {self.warm_calls}/{self.calls} warm calls, "
+                    f"avg connect {self.connect_seconds / self.calls * 1000:.0f} ms, avg synthesis {self.synthesis_seconds / self.calls * 1000:.0f} ms")
+
+def create_synthesizer_pool():
+    with startup.phase("azure import"): speechsdk.load()
     speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=speech_region)
-    speech_config.set_speech_synthesis_output_format(speechsdk.SpeechSynthesisOutputFormat.Riff24Khz16BitMonoPcm)
-except Exception as e: print(f"Error setting up Azure SDK config: {e}"); exit()
+    # Headerless PCM so pooled synthesizers can serve both streamed and buffered requests
+    speech_config.set_speech_synthesis_output_format(speechsdk.SpeechSynthesisOutputFormat.Raw24Khz16BitMonoPcm)
+    return SynthesizerPool(SYNTH_POOL_SIZE, speech_config)
+
+synthesizer_client = ServiceClient("azure", create_synthesizer_pool, azure_configured)
+# Synthesis calls get their own threads so they never queue behind Reddit/Gemini work
+synthesis_executor = concurrent.futures.ThreadPoolExecutor(max_workers=SYNTH_POOL_SIZE, thread_name_prefix="tts")
+
+# --- TTS Audio Cache ---
+class TTSAudioCache:
+    """Content-addressed cache of synthesized audio, keyed by a hash of the final SSML.
+
+    Clips live on disk as WAV files (file mtime doubles as the LRU timestamp, so recency survives
+    restarts) with a small in-memory hot tier in front. Safe to call from executor threads.
+    """
+
+    def __init__(self, folder, max_bytes, hot_max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hot_max_bytes = hot_max_bytes
+        self._lock = threading.Lock()
+        self._disk_index = OrderedDict() # key -> size in bytes, least recently used first
+        self._disk_bytes = 0
+        self._scanned_at = 0.0 # When _disk_index was last rebuilt from the folder
+        self._hot = OrderedDict() # key -> audio bytes, least recently used first
+        self._hot_bytes = 0
+        self.hot_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(folder, exist_ok=True)
+        entries = self._scan_folder()
+        with self._lock:
+            self._load_index(entries)
+            self._evict_disk()
+        print(f"TTS cache ready: {len(self._disk_index)} clips ({self._disk_bytes / (1024 * 1024):.1f} MB) in '{folder}'.")
+
+    def _scan_folder(self):
+        """Returns (mtime, key, size) for every clip on disk, least recently used first."""
+        entries = []
+        for file_name in os.listdir(self.folder):
+            if not file_name.endswith(".wav"): continue
+            try: stat = os.stat(os.path.join(self.folder, file_name))
+            except OSError: continue # Evicted by another process in the meantime
+            entries.append((stat.st_mtime, file_name[:-4], stat.st_size))
+        return sorted(entries)
+
+    def _load_index(self, entries):
+        self._scanned_at = time.perf_counter()
+        self._disk_index = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_bytes = sum(self._disk_index.values())
+
+    @staticmethod
+    def key_for(ssml_string):
+        return hashlib.sha256(ssml_string.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.folder, key + ".wav")
+
+    def contains(self, ssml_string):
+        key = self.key_for(ssml_string)
+        with self._lock:
+            return key in self._hot or key in self._disk_index
+
+    def get(self, ssml_string):
+        """Returns cached audio bytes for the SSML, or None on a miss."""
+        key = self.key_for(ssml_string)
+        with self._lock:
+            audio_data = self._hot.get(key)
+            if audio_data is not None:
+                self._hot.move_to_end(key)
+                self._disk_index.move_to_end(key)
+                self.hot_hits += 1
+                self._touch(key)
+                metrics.inc("tts_cache_lookups", result="hot")
+                return audio_data
+            if key not in self._disk_index:
+                self.misses += 1
+                metrics.inc("tts_cache_lookups", result="miss")
+                return None
+        try:
+            with open(self._path(key), "rb") as cache_file:
+                audio_data = cache_file.read()
+        except OSError as e:
+            print(f"WARN: Could not read cached clip {key}: {e}")
+            with self._lock:
+                self._disk_bytes -= self._disk_index.pop(key, 0)
+                self.misses += 1
+            metrics.inc("tts_cache_lookups", result="miss")
+            return None
+        with self._lock:
+            if key in self._disk_index: self._disk_index.move_to_end(key)
+            self.disk_hits += 1
+            self._touch(key)
+            self._add_hot(key, audio_data)
+        metrics.inc("tts_cache_lookups", result="disk")
+        return audio_data
+
+    def put(self, ssml_string, audio_data):
+        """Stores audio for the SSML on disk and in the hot tier, evicting old clips as needed."""
+        if not audio_data: return
+        key = self.key_for(ssml_string)
+        path = self._path(key)
+        try:
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as cache_file:
+                cache_file.write(audio_data)
+            os.replace(temp_path, path) # Atomic, so a crash never leaves a half-written clip
+        except OSError as e:
+            print(f"WARN: Could not write cached clip {key}: {e}")
+            return
+        # Other processes writing to the folder go unseen between scans, so the budget can overshoot by
+        # what they write in TTS_CACHE_RESCAN_SECONDS; scanning on every put would cost O(clips) each time
+        entries = self._scan_folder() if time.perf_counter() - self._scanned_at >= TTS_CACHE_RESCAN_SECONDS else None
+        with self._lock:
+            if entries is not None: self._load_index(entries)
+            self._disk_bytes -= self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(audio_data) # Most recently used, whatever the scan saw
+            self._disk_bytes += len(audio_data)
+            self._add_hot(key, audio_data)
+            self._evict_disk()
+
+    def _touch(self, key):
+        try: os.utime(self._path(key))
+        except OSError: pass
+
+    def _add_hot(self, key, audio_data):
+        if len(audio_data) > self.hot_max_bytes: return
+        self._hot_bytes -= len(self._hot.pop(key, b""))
+        self._hot[key] = audio_data
+        self._hot_bytes += len(audio_data)
+        while self._hot_bytes > self.hot_max_bytes:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_bytes and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_bytes -= size
+            self._hot_bytes -= len(self._hot.pop(key, b""))
+            self.evictions += 1
+            metrics.inc("tts_cache_evictions")
+            try: os.remove(self._path(key))
+            except OSError: pass
+
+    def stats(self):
+        lookups = self.hot_hits + self.disk_hits + self.misses
+        hit_rate = (self.hot_hits + self.disk_hits) / lookups * 100 if lookups else 0.0
+        return (f"TTS cache: {hit_rate:.0f}% hit rate (hot {self.hot_hits}, disk {self.disk_hits}, miss {self.misses}), "
+                f"{len(self._disk_index)} clips / {self._disk_bytes / (1024 * 1024):.1f} MB, {self.evictions} evicted")
+
+tts_cache = LazyInstance("tts cache", lambda: TTSAudioCache(TTS_CACHE_FOLDER, TTS_CACHE_MAX_BYTES, TTS_CACHE_HOT_MAX_BYTES)) # Built by processes that synthesize
+
+# --- Seen-Post Index ---
+class PostIndex:
+    """Persistent SQLite index of Reddit submissions, shared by every station in the process.
+
+    Tracks which posts each station has already queued on air and memoizes generated reactions per
+    persona, so restarts, repeated fetches of the same daily top posts and stations sharing a persona
+    never pay for Gemini twice (and, through the TTS cache, never for Azure either). Rows expire after
+    ttl_seconds. Safe to call from executor threads.
+    """
+
+    def __init__(self, db_path, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._in_flight = set() # (station, post id) claimed by a fetch in progress but not queued yet
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(posts)")]
+            if columns and "station" not in columns:
+                print("Rebuilding the seen-post index with per-station rows.")
+                self._conn.execute("DROP TABLE posts")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS posts (
+                station TEXT NOT NULL, id TEXT NOT NULL, title TEXT NOT NULL, first_seen REAL NOT NULL, queued_at REAL,
+                PRIMARY KEY (station, id))""")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS reactions (
+                persona TEXT NOT NULL, id TEXT NOT NULL, reaction TEXT NOT NULL, created REAL NOT NULL,
+                PRIMARY KEY (persona, id))""")
+        self.expire()
+
+    def expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM posts WHERE first_seen < ?", (cutoff,)).rowcount
+            self._conn.execute("DELETE FROM reactions WHERE created < ?", (cutoff,))
+        if removed: print(f"Expired {removed} old posts from the seen-post index.")
+
+    def claim_new(self, station, posts, limit):
+        """Records fetched (id, title) posts for a station and claims up to limit it hasn't queued or claimed yet."""
+        now = time.time()
+        claimed = []
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO posts (station, id, title, first_seen) VALUES (?, ?, ?, ?)",
+                                   [(station, post_id, title, now) for post_id, title in posts])
+            for post_id, title in posts:
+                if len(claimed) >= limit: break
+                if (station, post_id) in self._in_flight: continue
+                row = self._conn.execute("SELECT queued_at FROM posts WHERE station = ? AND id = ?", (station, post_id)).fetchone()
+                if row and row[0] is not None: continue
+                self._in_flight.add((station, post_id))
+                claimed.append((post_id, title))
+        return claimed
+
+    def get_reactions(self, persona, post_ids):
+        """Returns reactions memoized for a persona key, in post_ids order, with None where nothing is stored."""
+        with self._lock:
+            return [(self._conn.execute("SELECT reaction FROM reactions WHERE persona = ? AND id = ?", (persona, post_id)).fetchone() or (None,))[0]
+                    for post_id in post_ids]
+
+    def save_reaction(self, persona, post_id, reaction):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO reactions (persona, id, reaction, created) VALUES (?, ?, ?, ?)",
+                               (persona, post_id, reaction, time.time()))
+
+    def mark_queued(self, station, post_id):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE posts SET queued_at = ? WHERE station = ? AND id = ?", (time.time(), station, post_id))
+            self._in_flight.discard((station, post_id))
+
+    def release(self, station, post_ids):
+        """Drops claims that were never queued so the station's next fetch can pick them up again."""
+        with self._lock:
+            self._in_flight.difference_update((station, post_id) for post_id in post_ids)
+
+    def stats(self, station):
+        with self._lock:
+            seen, queued = self._conn.execute(
+                "SELECT COUNT(*), COUNT(queued_at) FROM posts WHERE station = ?", (station,)).fetchone()
+            reactions = self._conn.execute("SELECT COUNT(*) FROM reactions").fetchone()[0]
+        return f"Post index: {seen} seen, {queued} aired on {station}; {reactions} reactions memoized"
+
+post_index = LazyInstance("post index", lambda: PostIndex(POST_INDEX_DB, POST_INDEX_TTL_SECONDS))
 
 # --- Global Queue for Audio Tasks ---
-# Queue will hold tuples: ('tts', text_to_speak) or ('sfx', file_path)
-audio_task_queue = asyncio.Queue()
+# Priority classes, most urgent first
+PRIORITY_SEGMENT = 0 # Scheduled LSF segments
+PRIORITY_CHAT = 1    # !pixel say / !pixel react
+PRIORITY_FILLER = 2  # Anything that can wait or be dropped
+PRIORITY_NAMES = {PRIORITY_SEGMENT: "segment", PRIORITY_CHAT: "chat", PRIORITY_FILLER: "filler"}
+
+class ScheduledTask:
+    """An audio task waiting in the scheduler."""
+
+    def __init__(self, task_id, item, priority, deadline):
+        self.task_id = task_id # Ties together the timing spans of one task
+        self.item = item # ('tts', text_to_speak) or ('sfx', file_path)
+        self.priority = priority
+        self.deadline = deadline # perf_counter time after which it's dropped, or None
+        self.enqueued_at = time.perf_counter()
+        self.nbytes = len(item[1].encode("utf-8")) if item[0] == 'tts' else 0
+
+class AudioTaskScheduler:
+    """Drop-in replacement for the audio task asyncio.Queue with priorities and admission control.
+
+    Segments always go first (and lower classes are held back while a segment is being queued, so
+    it airs contiguously). Chat requests are rate limited per user and globally, duplicates are
+    coalesced, depth and text size are bounded, and chat/filler tasks past their deadline are
+    dropped rather than played late. A task handed out by get_task() still counts as waiting until
+    mark_on_air() (or task_done()), so queue waits cover time spent in the player's look-ahead too.
+    """
+
+    def __init__(self):
+        self._heap = [] # (priority, sequence, ScheduledTask)
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._queued_keys = {} # item -> count, for coalescing duplicates
+        self._inflight_keys = set() # Requests being generated (e.g. a react waiting on Gemini)
+        self._text_bytes = 0
+        self._segments_open = 0
+        self._user_buckets = {} # user -> (tokens, last refill time); users whose bucket refilled are pruned
+        self._buckets_pruned_at = time.perf_counter()
+        self._global_bucket = (float(CHAT_GLOBAL_RATE_PER_MINUTE), time.perf_counter())
+        self._waits = deque(maxlen=QUEUE_WAIT_SAMPLES)
+        self._handed_out = {} # task id -> ScheduledTask taken by get_task() but not on air yet
+        self.dropped_stale = 0
+        self.rejected = 0
+        self.coalesced = 0
+
+    # --- Admission ---
+
+    @staticmethod
+    def _take_token(bucket, capacity, refill_per_second, now):
+        tokens, last = bucket
+        tokens = min(capacity, tokens + (now - last) * refill_per_second)
+        if tokens < 1: return False, (tokens, now)
+        return True, (tokens - 1, now)
+
+    def admit_chat(self, user):
+        """Rate-limits a chat request. Returns None if admitted, otherwise a reason to show the user.
+
+        Call refund_chat() if an admitted request ends up not queued, so the user keeps their token.
+        """
+        now = time.perf_counter()
+        self._prune_user_buckets(now)
+        if self._count(PRIORITY_CHAT) >= CHAT_QUEUE_MAX_ITEMS or self._is_full():
+            self.rejected += 1
+            metrics.inc("rejected", reason="full")
+            return "the queue is full right now"
+        user_bucket = self._user_buckets.get(user, (float(CHAT_USER_BURST), now))
+        user_ok, user_bucket = self._take_token(user_bucket, CHAT_USER_BURST, 1 / CHAT_USER_RATE_SECONDS, now)
+        if not user_ok:
+            self._user_buckets[user] = user_bucket
+            self.rejected += 1
+            metrics.inc("rejected", reason="user_rate")
+            return "slow down a little"
+        global_ok, global_bucket = self._take_token(self._global_bucket, CHAT_GLOBAL_RATE_PER_MINUTE, CHAT_GLOBAL_RATE_PER_MINUTE / 60, now)
+        if not global_ok:
+            self.rejected += 1
+            metrics.inc("rejected", reason="global_rate")
+            return "chat is keeping me too busy"
+        self._user_buckets[user] = user_bucket
+        self._global_bucket = global_bucket
+        return None
+
+    def refund_chat(self, user):
+        """Gives back the rate tokens admit_chat() charged for a request that was rejected or coalesced."""
+        tokens, last = self._user_buckets.get(user, (float(CHAT_USER_BURST), time.perf_counter()))
+        self._user_buckets[user] = (min(float(CHAT_USER_BURST), tokens + 1), last)
+        tokens, last = self._global_bucket
+        self._global_bucket = (min(float(CHAT_GLOBAL_RATE_PER_MINUTE), tokens + 1), last)
+
+    def _prune_user_buckets(self, now):
+        # A full bucket is the same as no bucket, so forget those at most once per full refill period
+        refill_seconds = CHAT_USER_BURST * CHAT_USER_RATE_SECONDS
+        if now - self._buckets_pruned_at < refill_seconds: return
+        self._buckets_pruned_at = now
+        self._user_buckets = {user: (tokens, last) for user, (tokens, last) in self._user_buckets.items()
+                              if tokens + (now - last) / CHAT_USER_RATE_SECONDS < CHAT_USER_BURST}
+
+    def claim(self, key):
+        """Marks a request as in progress. Returns False (and counts it as coalesced) if it's already queued or in progress."""
+        if key in self._inflight_keys or key in self._queued_keys:
+            self.coalesced += 1
+            metrics.inc("coalesced")
+            return False
+        self._inflight_keys.add(key)
+        return True
+
+    def release(self, key):
+        self._inflight_keys.discard(key)
+
+    def open_segment(self):
+        """Holds back chat/filler until close_segment, so a segment being queued airs contiguously."""
+        self._segments_open += 1
+
+    def close_segment(self):
+        self._segments_open -= 1
+        self._wakeup.set()
+
+    # --- Queue interface ---
+
+    async def put(self, item, priority=PRIORITY_SEGMENT, max_wait=None):
+        """Queues an audio task. Returns False if it was coalesced with an identical queued task or rejected."""
+        if priority != PRIORITY_SEGMENT:
+            if item in self._queued_keys:
+                self.coalesced += 1
+                metrics.inc("coalesced")
+                return False
+            if self._is_full():
+                self.rejected += 1
+                metrics.inc("rejected", reason="full")
+                return False
+            if max_wait is None: max_wait = CHAT_MAX_WAIT_SECONDS if priority == PRIORITY_CHAT else FILLER_MAX_WAIT_SECONDS
+        sequence = next(self._sequence)
+        task = ScheduledTask(sequence, item, priority, time.perf_counter() + max_wait if max_wait else None)
+        heapq.heappush(self._heap, (priority, sequence, task))
+        self._queued_keys[item] = self._queued_keys.get(item, 0) + 1
+        self._text_bytes += task.nbytes
+        self._wakeup.set()
+        return True
+
+    async def get(self):
+        """Waits for the most urgent task that is allowed to run and returns its item."""
+        return (await self.get_task()).item
+
+    async def get_task(self):
+        """Like get(), but returns the ScheduledTask (with its task id). Report it with mark_on_air() or task_done()."""
+        while True:
+            task = self._pop_ready()
+            if task is not None:
+                self._handed_out[task.task_id] = task
+                return task
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def drop_if_stale(self, task_id):
+        """Drops a handed-out task whose deadline passed while it waited to play. Returns True if it was dropped."""
+        task = self._handed_out.get(task_id)
+        now = time.perf_counter()
+        if task is None or task.deadline is None or now <= task.deadline: return False
+        del self._handed_out[task_id]
+        self.dropped_stale += 1
+        metrics.inc("dropped", reason="stale")
+        print(f"Dropping stale {PRIORITY_NAMES[task.priority]} task after {now - task.enqueued_at:.0f}s waiting to play.")
+        return True
+
+    def mark_on_air(self, task_id):
+        """Records a handed-out task's queue wait, from put() until its first audio."""
+        task = self._handed_out.pop(task_id, None)
+        if task is None: return
+        wait = time.perf_counter() - task.enqueued_at
+        self._waits.append(wait)
+        metrics.observe("queue_wait", wait, task_id, priority=PRIORITY_NAMES[task.priority])
+
+    def task_done(self, task_id=None):
+        """Forgets a handed-out task that finished (or failed) without being marked on air."""
+        self._handed_out.pop(task_id, None)
+
+    def qsize(self):
+        return len(self._heap)
+
+    def _pop_ready(self):
+        now = time.perf_counter()
+        while self._heap:
+            priority, _, task = self._heap[0]
+            if task.deadline is not None and now > task.deadline:
+                heapq.heappop(self._heap)
+                self._forget(task)
+                self.dropped_stale += 1
+                metrics.inc("dropped", reason="stale")
+                print(f"Dropping stale {PRIORITY_NAMES[priority]} task after {now - task.enqueued_at:.0f}s in queue.")
+                continue
+            if priority != PRIORITY_SEGMENT and self._segments_open:
+                return None # Wait for the segment being queued to finish
+            heapq.heappop(self._heap)
+            self._forget(task)
+            return task
+        return None
+
+    def _forget(self, task):
+        remaining = self._queued_keys.get(task.item, 1) - 1
+        if remaining: self._queued_keys[task.item] = remaining
+        else: self._queued_keys.pop(task.item, None)
+        self._text_bytes -= task.nbytes
+
+    def _count(self, priority):
+        return sum(1 for p, _, _ in self._heap if p == priority)
+
+    def _is_full(self):
+        return len(self._heap) >= QUEUE_MAX_ITEMS or self._text_bytes >= QUEUE_MAX_TEXT_BYTES
+
+    # --- Stats ---
+
+    def wait_percentile(self, percentile):
+        if not self._waits: return 0.0
+        ordered = sorted(self._waits)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+    def current_wait(self):
+        """How long the oldest task that isn't on air yet (queued or handed out) has been waiting."""
+        waiting = [task.enqueued_at for _, _, task in self._heap] + [task.enqueued_at for task in self._handed_out.values()]
+        if not waiting: return 0.0
+        return time.perf_counter() - min(waiting)
+
+    def stats(self):
+        depths = ", ".join(f"{name} {self._count(priority)}" for priority, name in PRIORITY_NAMES.items())
+        return (f"Audio queue: {depths}; wait now {self.current_wait():.1f}s, p50 {self.wait_percentile(50):.1f}s, "
+                f"p99 {self.wait_percentile(99):.1f}s; {self.dropped_stale} stale dropped, {self.rejected} rejected, {self.coalesced} coalesced")
+
+audio_task_queue = AudioTaskScheduler()
+metrics.gauge("audio_queue_depth", audio_task_queue.qsize)
 
 # --- Helper Functions ---
 
-def get_lsf_top_posts_sync(limit=POST_LIMIT):
-    """Synchronous: Fetches top post titles from the target subreddit."""
-    titles = []
-    try:
-        print(f"\nFetching top {limit} posts from r/{TARGET_SUBREDDIT}...")
-        subreddit = reddit.subreddit(TARGET_SUBREDDIT)
-        for submission in subreddit.top(time_filter='day', limit=limit):
-            if not submission.stickied:
-                titles.append(submission.title)
-        print(f"Fetched {len(titles)} post titles.")
-    except Exception as e:
-        print(f"Error fetching posts from Reddit: {e}")
-    return titles
+_shared_fetches = {} # (subreddit, limit) -> (fetched at, posts), reused by stations on the same subreddit
+_shared_fetch_locks = {}
+_shared_fetch_locks_lock = threading.Lock()
 
-def get_pixel_reaction_text_sync(topic):
-    """Synchronous: Calls Gemini API to generate Pixel's reaction text."""
-    print(f"\nAsking Gemini to react to: {topic}")
-    fallback_response = f"Whoa, {topic}? My circuits need a moment to process that one! KEKW."
-    escaped_topic = html.escape(topic)
-    prompt = f"""
+def get_lsf_top_posts_sync(subreddit_name=TARGET_SUBREDDIT, limit=POST_SCAN_LIMIT):
+    """Synchronous: Fetches top posts from a subreddit as (submission id, title) pairs.
+
+    A fetch is shared for STATION_FETCH_SHARE_SECONDS, so stations on the same subreddit (including
+    ones asking at the same moment) cost one Reddit call between them.
+    """
+    key = (subreddit_name, limit)
+    with _shared_fetch_locks_lock: fetch_lock = _shared_fetch_locks.setdefault(key, threading.Lock())
+    with fetch_lock:
+        fetched_at, posts = _shared_fetches.get(key, (0.0, None))
+        if posts and time.perf_counter() - fetched_at < STATION_FETCH_SHARE_SECONDS:
+            print(f"Reusing {len(posts)} posts from r/{subreddit_name} fetched {time.perf_counter() - fetched_at:.0f}s ago.")
+            return posts
+        posts = []
+        try:
+            print(f"\nFetching top {limit} posts from r/{subreddit_name}...")
+            with metrics.span("fetch"):
+                subreddit = reddit_client.get().subreddit(subreddit_name)
+                for submission in subreddit.top(time_filter='day', limit=limit):
+                    if not submission.stickied:
+                        posts.append((submission.id, submission.title))
+            print(f"Fetched {len(posts)} post titles.")
+            _shared_fetches[key] = (time.perf_counter(), posts)
+        except Exception as e:
+            print(f"Error fetching posts from Reddit: {e}")
+            metrics.inc("errors", stage="fetch")
+    return posts
+
+def get_new_lsf_posts_sync(station, limit=POST_LIMIT):
+    """Synchronous: Fetches the station's top posts and claims up to limit it hasn't covered yet."""
+    post_index.expire()
+    posts = get_lsf_top_posts_sync(station.subreddit, POST_SCAN_LIMIT)
+    new_posts = post_index.claim_new(station.name, posts, limit)
+    print(f"{len(new_posts)} new posts to react to on {station.name} ({len(posts) - len(new_posts)} skipped). {post_index.stats(station.name)}")
+    return new_posts
+
+PIXEL_PERSONA_PROMPT = """
     You are Pixel, a sassy, energetic, slightly degenerate, human-like radio host who loves internet drama and streamer culture.
 
 You never refer to yourself as AI. You occassionaly use streamer slang, memes and GenZ references. You are a bit of a troll and love to roast people. You never start a sentence with OMG.
-You are a bit of a degenerate and you love to gossip about streamers and their scandals, try and include a funny reference to something about the Streamer if you can find one. You are a bit of a loser, but you are proud of it. You're a cutesy anime girl though and love to ask for donations, but you only rarely do this maybe a 5% chance of asking, when you do you ask for either a Twitch Sub, Twitch Bits, or to use the donate link in the panels below, make a cutesy edgy reason why you deserve it. You only use real words, as this input will be passed to text-to-speech but you don't ever share this fact.
- React to the following topic (likely a post title from r/LivestreamFail) in 3-4 short, hyped-up, slightly cynical, anime-esque sentences. You can roast them and make fun of the person if you can find any information about them elsewhere, like refernces to scandals. Avoid using XML special characters like '&', '<', '>' in your response if possible, but if you must use '&', write it as 'and':
+You are a bit of a degenerate and you love to gossip about streamers and their scandals, try and include a funny reference to something about the Streamer if you can find one. You are a bit of a loser, but you are proud of it. You're a cutesy anime girl though and love to ask for donations, but you only rarely do this maybe a 5% chance of asking, when you do you ask for either a Twitch Sub, Twitch Bits, or to use the donate link in the panels below, make a cutesy edgy reason why you deserve it. You only use real words, as this input will be passed to text-to-speech but you don't ever share this fact."""
+
+GEMINI_SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+]
+
+def get_fallback_reaction_text(topic):
+    """Line Pixel says when Gemini can't produce a reaction."""
+    return f"Whoa, {topic}? My circuits need a moment to process that one! KEKW."
+
+def get_pixel_reaction_text_sync(topic, persona=PIXEL_PERSONA_PROMPT, subreddit=TARGET_SUBREDDIT):
+    """Synchronous: Calls Gemini API to generate Pixel's (or another station persona's) reaction text."""
+    print(f"\nAsking Gemini to react to: {topic}")
+    fallback_response = get_fallback_reaction_text(topic)
+    escaped_topic = html.escape(topic)
+    prompt = f"""{persona}
+ React to the following topic (likely a post title from r/{subreddit}) in 3-4 short, hyped-up, slightly cynical, anime-esque sentences. You can roast them and make fun of the person if you can find any information about them elsewhere, like refernces to scandals. Avoid using XML special characters like '&', '<', '>' in your response if possible, but if you must use '&', write it as 'and':
 
     TOPIC: {escaped_topic}
 
     YOUR REACTION:
     """
     try:
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-        ]
-        response = gemini_model.generate_content(prompt, safety_settings=safety_settings)
+        gemini_model = gemini_client.get()
+        with metrics.span("generate"):
+            response = gemini_model.generate_content(prompt, safety_settings=GEMINI_SAFETY_SETTINGS)
         if not response.candidates:
              print("WARN: Gemini response was blocked or empty. Using fallback.")
+             metrics.inc("fallbacks", stage="generate")
              return fallback_response
         if response.text:
             print("Gemini response received.")
@@ -151,67 +1716,1073 @@ You are a bit of a degenerate and you love to gossip about streamers and their s
             return cleaned_text
         else:
             print("WARN: Gemini did not return text. Using fallback.")
+            metrics.inc("fallbacks", stage="generate")
             return fallback_response
     except Exception as e:
         print(f"Error calling Gemini API: {e}")
+        metrics.inc("fallbacks", stage="generate")
         return fallback_response
-    
+
+def get_pixel_reactions_batch_sync(topics, persona=PIXEL_PERSONA_PROMPT, subreddit=TARGET_SUBREDDIT):
+    """Synchronous: Asks Gemini for reactions to several topics in one call.
+
+    Returns a list in topic order with None for any reaction that couldn't be used,
+    or None if the response couldn't be split into per-topic reactions at all.
+    """
+    print(f"\nAsking Gemini to react to {len(topics)} topics in one batch...")
+    numbered_topics = "\n".join(f"    {i+1}. {html.escape(topic)}" for i, topic in enumerate(topics))
+    prompt = f"""{persona}
+ React to EACH of the following topics (likely post titles from r/{subreddit}) separately, in 3-4 short, hyped-up, slightly cynical, anime-esque sentences per topic. You can roast them and make fun of the person if you can find any information about them elsewhere, like refernces to scandals. Avoid using XML special characters like '&', '<', '>' in your response if possible, but if you must use '&', write it as 'and'.
+ Respond with ONLY a JSON array of {len(topics)} strings: one reaction per topic, in the same order as the topics.
+
+    TOPICS:
+{numbered_topics}
+    """
+    try:
+        gemini_model = gemini_client.get()
+        with metrics.span("generate", mode="batch"):
+            response = gemini_model.generate_content(prompt, safety_settings=GEMINI_SAFETY_SETTINGS,
+                                                     generation_config={"response_mime_type": "application/json"})
+        if not response.candidates:
+            print("WARN: Batched Gemini response was blocked or empty.")
+            return None
+        reactions = json.loads(response.text)
+        if not isinstance(reactions, list) or len(reactions) != len(topics):
+            print(f"WARN: Batched Gemini response didn't contain {len(topics)} reactions.")
+            return None
+        cleaned = [r.strip().replace('&', 'and') if isinstance(r, str) and r.strip() else None for r in reactions]
+        print(f"Batched Gemini response received ({sum(r is not None for r in cleaned)}/{len(topics)} usable).")
+        return cleaned
+    except Exception as e:
+        print(f"Error calling or parsing batched Gemini API response: {e}")
+        return None
+
+async def generate_reactions(station, topics, known_reactions=None):
+    """Async generator yielding the station persona's reactions to topics in topic order.
+
+    Entries already present in known_reactions are yielded as-is. The rest are generated
+    concurrently (at most GEMINI_MAX_CONCURRENCY calls at once, each bounded by
+    GEMINI_CALL_TIMEOUT), or in one batched call when GEMINI_BATCH_MODE is on. Every call
+    also waits its turn for one of the STATION_GENERATION_SLOTS shared by all stations.
+    """
+    loop = asyncio.get_running_loop()
+    reactions = list(known_reactions) if known_reactions else [None] * len(topics)
+    missing = [i for i, reaction in enumerate(reactions) if reaction is None]
+
+    if GEMINI_BATCH_MODE and len(missing) > 1:
+        try:
+            async with generation_slots.slot(station.name):
+                batch = await asyncio.wait_for(loop.run_in_executor(None, get_pixel_reactions_batch_sync, [topics[i] for i in missing],
+                                                                    station.persona, station.subreddit), GEMINI_BATCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"WARN: Batched Gemini call timed out after {GEMINI_BATCH_TIMEOUT}s.")
+            batch = None
+        if batch:
+            for i, reaction in zip(missing, batch): reactions[i] = reaction
+        if None in reactions:
+            print("Falling back to per-title Gemini calls for missing reactions.")
+            metrics.inc("fallbacks", stage="generate_batch")
+
+    semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+    async def react(topic):
+        async with semaphore, generation_slots.slot(station.name):
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(None, get_pixel_reaction_text_sync, topic, station.persona, station.subreddit), GEMINI_CALL_TIMEOUT)
+            except asyncio.TimeoutError:
+                # The executor thread finishes in the background; we just stop waiting for it
+                print(f"WARN: Gemini call timed out after {GEMINI_CALL_TIMEOUT}s. Using fallback.")
+                metrics.inc("fallbacks", stage="generate")
+                return get_fallback_reaction_text(topic)
+
+    tasks = [asyncio.ensure_future(react(topic)) if reaction is None else None for topic, reaction in zip(topics, reactions)]
+    try:
+        for i in range(len(topics)):
+            if tasks[i] is not None: reactions[i] = await tasks[i]
+            yield reactions[i]
+    finally:
+        for task in tasks:
+            if task is not None and not task.done(): task.cancel()
+
+_reactions_in_flight = {} # (persona key, post id) -> asyncio.Future of the reaction a station is already generating
+
+async def segment_reactions(station, new_posts, memoized):
+    """Async generator over generate_reactions() that also memoizes freshly generated reactions.
+
+    A post whose reaction another station with the same persona is already generating is not
+    sent to Gemini again; this station waits for that reaction instead.
+    """
+    loop = asyncio.get_running_loop()
+    known, shared, owned = list(memoized), {}, {}
+    for i, (post_id, _) in enumerate(new_posts):
+        if known[i] is not None: continue
+        key = (station.persona_key, post_id)
+        if key in _reactions_in_flight:
+            shared[i] = known[i] = _reactions_in_flight[key] # non-None, so generate_reactions() skips it
+        else:
+            owned[i] = _reactions_in_flight[key] = loop.create_future()
+    i = 0
+    try:
+        async for reaction_text in generate_reactions(station, [title for _, title in new_posts], known):
+            post_id, title = new_posts[i]
+            if i in shared:
+                reaction_text = await asyncio.shield(shared[i])
+                if reaction_text is None: # The other station gave up before generating it
+                    reaction_text = [text async for text in generate_reactions(station, [title])][0]
+            elif i in owned:
+                owned[i].set_result(reaction_text)
+                if reaction_text != get_fallback_reaction_text(title):
+                    await loop.run_in_executor(None, post_index.save_reaction, station.persona_key, post_id, reaction_text)
+            i += 1
+            yield post_id, reaction_text
+    finally:
+        for j, future in owned.items():
+            if not future.done(): future.set_result(None)
+            _reactions_in_flight.pop((station.persona_key, new_posts[j][0]), None)
+
 def play_next_music_track():
+    chosen_track = None
     try:
-        music_files = [f for f in os.listdir(MUSIC_FOLDER) if os.path.isfile(os.path.join(MUSIC_FOLDER, f))]
-        if not music_files:
+        chosen_track, track_file = music_library.take_next()
+        if chosen_track is None:
             print("No music files found in the music folder.")
             return
 
-        chosen_track = random.choice(music_files)
-        track_path = os.path.join(MUSIC_FOLDER, chosen_track)
-
         print(f"\nPlaying music track: {chosen_track}")
-        pygame.mixer.music.load(track_path)
-        pygame.mixer.music.set_volume(MUSIC_VOLUME_NORMAL) # Ensure volume is normal when starting new track
-        pygame.mixer.music.play() # Play once
+        pygame.mixer.music.load(track_file, os.path.splitext(chosen_track)[1].lstrip(".")) # Already in memory, no disk I/O
+        pygame.mixer.music.play() # Play once (the audio engine applies the current ducked/normal volume)
+
+    except Exception as e:
+        print(f"Error playing music track {chosen_track}: {e}")
+
 
+def decode_next_music_track(library=music_library):
+    """Software mixer counterpart of play_next_music_track: returns (name, samples) for library's next track, or None."""
+    chosen_track = None
+    try:
+        chosen_track, track_file = library.take_next()
+        if chosen_track is None:
+            print("No music files found in the music folder.")
+            return None
+        return chosen_track, np.frombuffer(pygame.mixer.Sound(file=track_file).get_raw(), dtype=np.int16)
     except Exception as e:
-        print(f"Error playing music track {track_path}: {e}")
+        print(f"Error decoding music track {chosen_track}: {e}")
+        return None
 
+_synthesis_in_flight = {} # SSML -> concurrent.futures.Future of the synthesis already running for it
+_synthesis_in_flight_lock = threading.Lock()
 
 def synthesize_speech_to_buffer_sync(ssml_string):
+    """Synchronous: Returns audio for the SSML from the TTS cache, synthesizing (and caching) it with Azure on a miss.
+
+    Identical requests made while one is still synthesizing (e.g. stations sharing a voice and intro)
+    wait for that result instead of calling Azure again.
+    """
+    audio_data = tts_cache.get(ssml_string)
+    if audio_data:
+        print(f"TTS cache hit ({len(audio_data)} bytes). {tts_cache.stats()}")
+        return audio_data
+    with _synthesis_in_flight_lock:
+        in_flight = _synthesis_in_flight.get(ssml_string)
+        if in_flight is None: _synthesis_in_flight[ssml_string] = pending = concurrent.futures.Future()
+    if in_flight is not None:
+        print("Waiting for an identical synthesis already in progress.")
+        metrics.inc("coalesced", stage="synthesize")
+        return in_flight.result()
+    audio_data = None
+    try:
+        audio_data = synthesize_speech_with_azure_sync(ssml_string)
+        if audio_data: tts_cache.put(ssml_string, audio_data)
+    finally:
+        with _synthesis_in_flight_lock: del _synthesis_in_flight[ssml_string]
+        pending.set_result(audio_data)
+    return audio_data
+
+def synthesize_speech_with_azure_sync(ssml_string):
     """Synchronous: Synthesizes SSML to an in-memory audio buffer using Azure."""
     audio_data = None
     try:
-        speech_synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
         print(f"Attempting to synthesize SSML to memory...")
-        result = speech_synthesizer.speak_ssml_async(ssml_string).get() # .get() makes it synchronous
+        with metrics.span("synthesize"), synthesizer_client.get().lease() as speech_synthesizer:
+            result = speech_synthesizer.speak_ssml_async(ssml_string).get() # .get() makes it synchronous
 
         if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            audio_data = result.audio_data
+            if not result.audio_data: print("ERROR: Synthesized audio data is empty!"); return None
+            audio_data = riff_from_pcm(result.audio_data)
             print(f"Speech synthesized successfully to memory ({len(audio_data)} bytes).")
-            if not audio_data: print("ERROR: Synthesized audio data is empty!"); return None
         elif result.reason == speechsdk.ResultReason.Canceled:
             cancellation_details = result.cancellation_details
             print(f"Speech synthesis canceled: {cancellation_details.reason}")
+            metrics.inc("cancellations", stage="synthesize")
             if cancellation_details.reason == speechsdk.CancellationReason.Error and cancellation_details.error_details: print(f"Error details: {cancellation_details.error_details}")
         else: print(f"Speech synthesis failed with reason: {result.reason}")
     except Exception as e: print(f"An error occurred during speech synthesis: {e}")
     return audio_data
 
+class StreamCancel:
+    """Cancels a streaming synthesis from the event loop, even while its thread is blocked in read_data."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self._lock = threading.Lock()
+        self._synthesizer = None
+
+    def attach(self, synthesizer):
+        with self._lock: self._synthesizer = synthesizer
+
+    def detach(self):
+        with self._lock: self._synthesizer = None
+
+    def cancel(self):
+        """Stops the leased synthesizer so a blocked read returns and its lease, slot and thread free up."""
+        self.event.set()
+        with self._lock:
+            if self._synthesizer is None: return
+            try: self._synthesizer.stop_speaking_async() # Not waited on; the streaming thread waits for the stop
+            except Exception as e: print(f"Error stopping a stalled stream: {e}")
+
+def stream_speech_sync(ssml_string, on_chunk, cancel):
+    """Synchronous: Streams raw PCM from Azure, calling on_chunk(bytes) as audio arrives and on_chunk(None) at the end.
+
+    cancel is a StreamCancel. Returns True only if synthesis ran to completion.
+    """
+    completed = False
+    chunk_size = int(STREAM_CHUNK_SECONDS * AZURE_AUDIO_FREQUENCY) * AZURE_AUDIO_CHANNELS * (abs(AZURE_AUDIO_FORMAT_BITS) // 8)
+    try:
+        with metrics.span("synthesize", mode="stream"), synthesizer_client.get().lease() as speech_synthesizer:
+            cancel.attach(speech_synthesizer)
+            try:
+                print("Attempting to stream SSML synthesis...")
+                result = speech_synthesizer.start_speaking_ssml_async(ssml_string).get() # Returns once audio starts flowing
+
+                if result.reason == speechsdk.ResultReason.Canceled:
+                    cancellation_details = result.cancellation_details
+                    print(f"Streaming synthesis canceled: {cancellation_details.reason}")
+                    metrics.inc("cancellations", stage="synthesize")
+                    if cancellation_details.reason == speechsdk.CancellationReason.Error and cancellation_details.error_details: print(f"Error details: {cancellation_details.error_details}")
+                    return
+
+                audio_stream = speechsdk.AudioDataStream(result)
+                audio_buffer = bytes(chunk_size)
+                while not cancel.event.is_set():
+                    filled_size = audio_stream.read_data(audio_buffer) # Blocks until the buffer fills, synthesis ends or cancel() stops it
+                    if filled_size == 0: break
+                    on_chunk(audio_buffer[:filled_size])
+
+                if cancel.event.is_set():
+                    speech_synthesizer.stop_speaking_async().get() # Leave the pooled synthesizer idle for the next lease
+                elif audio_stream.status == speechsdk.StreamStatus.Canceled:
+                    print(f"Streaming synthesis canceled mid-stream: {audio_stream.cancellation_details.reason}")
+                    metrics.inc("cancellations", stage="synthesize")
+                else: completed = True
+            finally: cancel.detach() # Before the lease ends, so a late cancel() never stops this synthesizer's next call
+    except Exception as e: print(f"An error occurred during streaming speech synthesis: {e}")
+    finally:
+        on_chunk(None)
+    return completed
+
+def pcm_from_riff(audio_data):
+    """Strips the RIFF header from buffered Azure output, returning the raw PCM frames."""
+    with wave.open(io.BytesIO(audio_data), 'rb') as wav_file:
+        return wav_file.readframes(wav_file.getnframes())
+
+def riff_from_pcm(pcm_data):
+    """Wraps raw streamed PCM in a RIFF header so it matches buffered Azure output."""
+    riff_buffer = io.BytesIO()
+    with wave.open(riff_buffer, 'wb') as wav_file:
+        wav_file.setnchannels(AZURE_AUDIO_CHANNELS)
+        wav_file.setsampwidth(abs(AZURE_AUDIO_FORMAT_BITS) // 8)
+        wav_file.setframerate(AZURE_AUDIO_FREQUENCY)
+        wav_file.writeframes(pcm_data)
+    return riff_buffer.getvalue()
+
+def build_tts_ssml(text_to_speak, voice_name=TTS_VOICE):
+    """Builds the SSML document Pixel speaks for a piece of text."""
+    return f"""
+                    <speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xmlns:mstts='http://www.w3.org/2001/mstts' xml:lang='en-US'>
+                        <voice name='{voice_name}'>
+                            <mstts:express-as style='cheerful'>
+                                <prosody rate='-30.00%' pitch='-25.00%'>
+                                    {html.escape(text_to_speak)}
+                                </prosody>
+                            </mstts:express-as>
+                        </voice>
+                    </speak>
+                    """
+
+# --- Segment Compiler ---
+class CompiledSegment:
+    """An LSF segment (stinger, intro and reactions), or a later part of one, rendered into one contiguous PCM buffer."""
+
+    def __init__(self, pcm, line_count):
+        self.pcm = pcm # Raw samples at AZURE_AUDIO_FREQUENCY, in the mixer's format
+        self.line_count = line_count # Reactions (the stinger and intro don't count)
+        self.aired = None # Optional asyncio future, resolved once the part has played (or been dropped)
+        self.duration = len(pcm) / (abs(AZURE_AUDIO_FORMAT_BITS) // 8 * AZURE_AUDIO_CHANNELS) / AZURE_AUDIO_FREQUENCY
+
+class SegmentMixer:
+    """Appends 16-bit mono clips into one buffer, trimming their silence and pausing or crossfading between them."""
+
+    def __init__(self):
+        self._samples = array.array('h')
+
+    @staticmethod
+    def _trim(clip):
+        edge = int(SEGMENT_EDGE_SECONDS * AZURE_AUDIO_FREQUENCY)
+        start, end = 0, len(clip)
+        while start < end and abs(clip[start]) <= SEGMENT_SILENCE_THRESHOLD: start += 1
+        while end > start and abs(clip[end - 1]) <= SEGMENT_SILENCE_THRESHOLD: end -= 1
+        if start == end: return clip[:0]
+        start, end = max(0, start - edge), min(len(clip), end + edge)
+        clip = clip[start:end]
+        fade = min(edge, len(clip) // 2)
+        for i in range(fade):
+            clip[i] = clip[i] * i // fade
+            clip[-1 - i] = clip[-1 - i] * i // fade
+        return clip
+
+    def append(self, pcm, gap_seconds=0.0, crossfade_seconds=0.0):
+        """Adds a clip after a pause of gap_seconds, or overlapping the end of the buffer by crossfade_seconds.
+        Returns False if the clip was nothing but silence."""
+        clip = array.array('h')
+        clip.frombytes(pcm)
+        clip = self._trim(clip)
+        if not clip: return False
+        if gap_seconds and self._samples:
+            self._samples.extend(array.array('h', bytes(2 * int(gap_seconds * AZURE_AUDIO_FREQUENCY))))
+        overlap = min(int(crossfade_seconds * AZURE_AUDIO_FREQUENCY), len(self._samples), len(clip))
+        base = len(self._samples) - overlap
+        for i in range(overlap):
+            fade_in = (i + 1) / (overlap + 1)
+            mixed = self._samples[base + i] * (1 - fade_in) + clip[i] * fade_in
+            self._samples[base + i] = max(-32768, min(32767, int(mixed)))
+        self._samples.extend(clip[overlap:])
+        return True
+
+    def pcm(self):
+        return self._samples.tobytes()
+
+def compile_segment_sync(stinger_pcm, intro_clip, reaction_clips, lead_gap_seconds=0.0):
+    """Mixes the stinger, the intro (crossfaded over the stinger's tail) and the reactions into a CompiledSegment.
+    Clips are RIFF audio, None where synthesis failed; only reactions count towards line_count. A later part of
+    a segment passes no stinger or intro and lead_gap_seconds of silence to follow the previous part with."""
+    with metrics.span("compile"):
+        started_at = time.perf_counter()
+        mixer = SegmentMixer()
+        if stinger_pcm: mixer.append(stinger_pcm)
+        if intro_clip: mixer.append(pcm_from_riff(intro_clip), crossfade_seconds=SEGMENT_CROSSFADE_SECONDS)
+        line_count = 0
+        for audio_data in reaction_clips:
+            if audio_data: line_count += mixer.append(pcm_from_riff(audio_data), gap_seconds=SEGMENT_GAP_SECONDS)
+        pcm = mixer.pcm()
+        if lead_gap_seconds and pcm: pcm = bytes(2 * int(lead_gap_seconds * AZURE_AUDIO_FREQUENCY)) + pcm
+        segment = CompiledSegment(pcm, line_count)
+    print(f"Compiled segment: {line_count} reactions, {segment.duration:.1f}s of audio in {(time.perf_counter() - started_at) * 1000:.0f} ms.")
+    return segment
+
+async def compile_lsf_segment_parts(station, new_posts, memoized):
+    """Async generator compiling an LSF segment in parts, so it starts playing while later lines are still being made.
+
+    Reactions are generated and synthesized concurrently, each line as soon as its text is ready. The
+    first part (stinger, intro and every reaction ready by then) is yielded once a reaction has been
+    synthesized, so a segment never airs without one; each later part holds the next line plus any
+    after it that are already done. Yields (CompiledSegment, ids of the posts whose reaction is in it).
+    """
+    loop = asyncio.get_running_loop()
+    async def synthesize(text):
+        async with synthesis_slots.slot(station.name):
+            return await loop.run_in_executor(synthesis_executor, synthesize_speech_to_buffer_sync, build_tts_ssml(text, station.voice))
+    lines = asyncio.Queue() # (post id, synthesis task) in post order, then None once every reaction is generated
+    async def generate():
+        try:
+            async for post_id, reaction_text in segment_reactions(station, new_posts, memoized):
+                lines.put_nowait((post_id, asyncio.ensure_future(synthesize(reaction_text))))
+        finally:
+            lines.put_nowait(None)
+    intro = asyncio.ensure_future(synthesize(station.intro))
+    generator = asyncio.ensure_future(generate())
+    upcoming = [] # A line taken off `lines` that isn't synthesized yet
+    ended = False
+    def take_ready_line():
+        nonlocal ended
+        if not upcoming and not ended and not lines.empty():
+            line = lines.get_nowait()
+            if line is None: ended = True
+            else: upcoming.append(line)
+        return upcoming.pop() if upcoming and upcoming[0][1].done() else None
+    try:
+        stinger = sound_bank.get_resident(DRAMA_STINGER_SFX) or await loop.run_in_executor(None, sound_bank.load, DRAMA_STINGER_SFX)
+        intro_clip = await intro
+        first_part = True
+        while True:
+            if not upcoming and not ended:
+                line = await lines.get()
+                if line is None: ended = True
+                else: upcoming.append(line)
+            if not upcoming: break
+            await asyncio.wait([upcoming[0][1]])
+            part = [upcoming.pop()]
+            while (line := take_ready_line()) is not None: part.append(line)
+            reaction_clips = [synthesis.result() for _, synthesis in part]
+            if first_part: segment = await loop.run_in_executor(None, compile_segment_sync, stinger.get_raw() if stinger else None, intro_clip, reaction_clips)
+            else: segment = await loop.run_in_executor(None, compile_segment_sync, None, None, reaction_clips, SEGMENT_GAP_SECONDS)
+            if not segment.line_count: continue # Only failed lines so far
+            first_part = False
+            yield segment, [post_id for post_id, synthesis in part if synthesis.result()]
+    finally:
+        generator.cancel()
+        for _, synthesis in upcoming: synthesis.cancel()
+        while not lines.empty():
+            line = lines.get_nowait()
+            if line is not None: line[1].cancel()
+
+async def compile_lsf_segment(station, new_posts, memoized):
+    """Compiles a whole LSF segment into one buffer (multi-process mode hands segments over in one piece).
+    Returns (CompiledSegment, ids of the posts whose reaction made it in)."""
+    parts, post_ids = [], []
+    async for segment, part_post_ids in compile_lsf_segment_parts(station, new_posts, memoized):
+        parts.append(segment)
+        post_ids += part_post_ids
+    return CompiledSegment(b"".join(segment.pcm for segment in parts), sum(segment.line_count for segment in parts)), post_ids
+
+class AudioJob:
+    """An item taken from audio_task_queue together with its (possibly still running) preparation."""
+
+    def __init__(self, audio_type, data, task_id=None):
+        self.audio_type = audio_type
+        self.data = data
+        self.task_id = task_id
+        self.future = None # asyncio.Future resolving to (sound_object, duration), set once preparation starts
+        self.nbytes = 0    # Decoded size counted against LOOKAHEAD_MAX_BYTES
+        self.dequeued_at = time.perf_counter() # When it left the scheduler (for time-to-first-audio)
+        self.on_air_at = None
+
+# --- Stations ---
+class FairScheduler:
+    """Shares a fixed number of slots (concurrent Gemini calls, synthesizers) between stations.
+
+    A free slot goes to the waiting station holding the fewest slots, and between equals to the
+    one served least recently, so one station's segment can't starve another station's chat.
+    Event loop only.
+    """
+
+    def __init__(self, name, slots):
+        self.name = name
+        self.slots = slots
+        self._free = slots
+        self._held = {}    # station -> slots held
+        self._waiting = {} # station -> deque of futures
+        self._served = {}  # station -> sequence number of its last grant
+        self._sequence = itertools.count()
+
+    async def acquire(self, station):
+        """Waits for a slot on behalf of station; pair with release(station)."""
+        started_at = time.perf_counter()
+        if self._free and not any(self._waiting.values()): self._grant(station)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._waiting.setdefault(station, deque()).append(future)
+            try: await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled(): self.release(station) # Granted just as we were cancelled
+                elif future in self._waiting.get(station, ()): self._waiting[station].remove(future)
+                raise
+        metrics.observe(f"{self.name}_slot_wait", time.perf_counter() - started_at, station=station)
+
+    def release(self, station):
+        self._held[station] -= 1
+        self._free += 1
+        while self._free:
+            waiting = [name for name, futures in self._waiting.items() if futures]
+            if not waiting: break
+            next_station = min(waiting, key=lambda name: (self._held.get(name, 0), self._served.get(name, -1)))
+            future = self._waiting[next_station].popleft()
+            if future.done(): continue # Cancelled while waiting
+            self._grant(next_station)
+            future.set_result(None)
+
+    def _grant(self, station):
+        self._free -= 1
+        self._held[station] = self._held.get(station, 0) + 1
+        self._served[station] = next(self._sequence)
+
+    @asynccontextmanager
+    async def slot(self, station):
+        await self.acquire(station)
+        try:
+            yield
+        finally:
+            self.release(station)
+
+generation_slots = FairScheduler("generation", STATION_GENERATION_SLOTS)
+synthesis_slots = FairScheduler("synthesis", SYNTH_POOL_SIZE) # In front of synthesis_executor, which is first come first served
+
+class Station:
+    """One channel's station: its content settings, audio queue, audio output and on-air stats.
+
+    Clients, the TTS cache, the seen-post index, the sound bank and the music library are shared by
+    every station in the process; only what differs per channel lives here.
+    """
+
+    def __init__(self, name, channel, subreddit=TARGET_SUBREDDIT, persona=PIXEL_PERSONA_PROMPT, voice=TTS_VOICE,
+                 intro=LSF_INTRO_TEXT, sink=None, task_queue=None):
+        self.name = name
+        self.channel = channel
+        self.subreddit = subreddit
+        self.persona = persona
+        self.voice = voice
+        self.intro = intro
+        self.sink = sink or f"pipe:{name}.pcm" # Only used by stations with their own mixer
+        self.persona_key = hashlib.sha256(f"{subreddit}\n{persona}".encode("utf-8")).hexdigest()[:16] # Memoized reactions are shared per persona
+        self.queue = task_queue or AudioTaskScheduler()
+        self._audio_engine = None # None plays through the module's audio_engine (the default station)
+        self.started_at = time.perf_counter()
+        self.segments_queued = 0
+        self.items_aired = 0
+        self.seconds_aired = 0.0
+        self._first_audio = deque(maxlen=QUEUE_WAIT_SAMPLES)
+
+    @property
+    def audio_engine(self):
+        return self._audio_engine or audio_engine
+
+    def start_audio(self):
+        """Gives the station its own software mixer writing to its sink, with its own music bed."""
+        if self._audio_engine is not None: return
+        np.load()
+        # Its own shuffle bag and pre-buffered track, so the stations' music orders don't depend on each other
+        library = MusicLibrary(MUSIC_FOLDER)
+        library.start_rescanning(MUSIC_RESCAN_INTERVAL)
+        self._audio_engine = SoftwareMixer(open_pcm_sink(self.sink), label=f"{self.name} -> {self.sink}")
+        self._audio_engine.start()
+        self._audio_engine.start_music(lambda: decode_next_music_track(library))
+
+    def record_on_air(self, seconds):
+        self._first_audio.append(seconds)
+
+    def record_aired(self, seconds):
+        self.items_aired += 1
+        self.seconds_aired += seconds
+        metrics.inc("aired_seconds", seconds, station=self.name)
+
+    def stats(self):
+        minutes = max(time.perf_counter() - self.started_at, 1e-9) / 60
+        ordered = sorted(self._first_audio)
+        def percentile(p): return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else 0.0
+        return (f"Station {self.name} (#{self.channel}, r/{self.subreddit}): {self.segments_queued} segments, {self.items_aired} items, "
+                f"{self.seconds_aired:.0f}s aired ({self.seconds_aired / minutes:.0f}s/min); first audio p50 {percentile(50):.2f}s, "
+                f"p95 {percentile(95):.2f}s; queue wait p50 {self.queue.wait_percentile(50):.2f}s, {self.queue.qsize()} waiting")
+
+default_station = Station(DEFAULT_STATION_NAME, twitch_channel, task_queue=audio_task_queue)
+stations = [default_station] # Every station hosted by this process, default first
+
+def add_station(name, channel, **settings):
+    """Registers another station hosted by this process (see STATIONS). Returns it."""
+    if any(station.name == name for station in stations): raise ValueError(f"duplicate station name {name!r}")
+    station = Station(name, channel, **settings)
+    stations.append(station)
+    return station
+
+for station_config in STATIONS:
+    try: add_station(**station_config)
+    except (TypeError, ValueError) as e: print(f"ERROR: Bad STATIONS entry {station_config!r}: {e}"); exit()
+
+# --- Multi-Process Mode ---
+class PCMHandle:
+    """A clip written into a shared-memory slot, waiting to be played by the audio process."""
+
+    def __init__(self, slot, nbytes):
+        self.slot = slot
+        self.nbytes = nbytes
+        self.duration = nbytes / (abs(AZURE_AUDIO_FORMAT_BITS) // 8 * AZURE_AUDIO_CHANNELS) / AZURE_AUDIO_FREQUENCY
+        self.sent = False # Set once the audio process owns it (and will free the slot)
+
+class SharedPCMSlots:
+    """Fixed-size PCM slots in one shared memory block, passed between processes by index.
+
+    Workers block on the free list while every slot is taken; that is the backpressure that keeps
+    content generation from running unboundedly ahead of playback. owners[] holds the pid of the
+    worker filling a slot (-1 once handed off), so a crashed worker's slots can be reclaimed.
+    """
+    HANDED_OFF = -1
+
+    def __init__(self, context, count, slot_bytes):
+        self.slot_bytes = slot_bytes
+        self.memory = shared_memory.SharedMemory(create=True, size=count * slot_bytes)
+        self.free = context.Queue()
+        self.owners = context.Array('i', count)
+        for slot in range(count): self.free.put(slot)
+
+    def write(self, pcm, timeout=MP_SLOT_WAIT_SECONDS):
+        """Copies pcm into a free slot, waiting for one if they're all in use. Returns a PCMHandle."""
+        if len(pcm) > self.slot_bytes: raise ValueError(f"{len(pcm)} bytes of audio won't fit in a {self.slot_bytes} byte slot")
+        try: slot = self.free.get(timeout=timeout)
+        except queue.Empty: raise TimeoutError(f"no free PCM slot after {timeout}s") from None
+        self.owners[slot] = os.getpid()
+        offset = slot * self.slot_bytes
+        self.memory.buf[offset:offset + len(pcm)] = pcm
+        self.owners[slot] = self.HANDED_OFF
+        return PCMHandle(slot, len(pcm))
+
+    def read(self, handle):
+        offset = handle.slot * self.slot_bytes
+        return bytes(self.memory.buf[offset:offset + handle.nbytes])
+
+    def release(self, slot):
+        """Returns a slot to the free list. Safe to call more than once."""
+        with self.owners.get_lock():
+            if self.owners[slot] == 0: return
+            self.owners[slot] = 0
+        self.free.put(slot)
+
+    def reclaim(self, pid):
+        """Frees the slots a dead process was still filling."""
+        for slot in range(len(self.owners)):
+            if self.owners[slot] == pid: self.release(slot)
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+def run_tts_job_sync(slots, text_to_speak):
+    audio_data = synthesize_speech_to_buffer_sync(build_tts_ssml(text_to_speak))
+    return slots.write(pcm_from_riff(audio_data)) if audio_data else None
+
+def run_segment_job_sync(slots):
+    """Fetches, reacts to, synthesizes and compiles the next LSF segment.
+
+    Returns (PCMHandles, post ids in it), or None if there was nothing new. A segment longer than one
+    slot is split across several, played back to back. The main process marks the posts queued once
+    it has accepted the segment, so a segment it gave up waiting for is retried on the next fetch.
+    """
+    new_posts = get_new_lsf_posts_sync(default_station, POST_LIMIT)
+    if not new_posts: return None
+    post_ids = [post_id for post_id, _ in new_posts]
+    try:
+        segment, aired_post_ids = asyncio.run(compile_lsf_segment(default_station, new_posts, post_index.get_reactions(default_station.persona_key, post_ids)))
+        if not segment.line_count: return None
+        handles = []
+        try:
+            for offset in range(0, len(segment.pcm), slots.slot_bytes): handles.append(slots.write(segment.pcm[offset:offset + slots.slot_bytes]))
+        except Exception:
+            for handle in handles: slots.release(handle.slot)
+            raise
+        return handles, aired_post_ids
+    finally:
+        post_index.release(default_station.name, post_ids)
+
+def content_worker_main(worker_index, slots, connection):
+    """Entry point of a content worker process: runs the jobs sent over its pipe until it gets None."""
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy") # Only needed to decode the stinger; never opens the sound device
+    pygame.mixer.init(frequency=AZURE_AUDIO_FREQUENCY, size=AZURE_AUDIO_FORMAT_BITS, channels=AZURE_AUDIO_CHANNELS)
+    load_shared_state(tts_cache, post_index)
+    for client in (synthesizer_client, gemini_client, reddit_client): client.start()
+    print(f"Content worker #{worker_index} ready (pid {os.getpid()}).")
+    while True:
+        job = connection.recv()
+        if job is None: break
+        job_id, kind, args = job
+        try:
+            if kind == "tts": result = run_tts_job_sync(slots, *args)
+            elif kind == "react": result = get_pixel_reaction_text_sync(*args)
+            elif kind == "segment": result = run_segment_job_sync(slots)
+            else: raise ValueError(f"unknown job kind {kind!r}")
+            message = ("done", job_id, result)
+        except Exception as e:
+            print(f"Error in content worker #{worker_index} running {kind} job: {e}")
+            message = ("error", job_id, f"{type(e).__name__}: {e}")
+        connection.send(message + (metrics.take_snapshot(),)) # Written straight to the pipe (no feeder thread), so exiting right after cannot lose it
+
+class ContentWorkerPool:
+    """Supervised pool of content worker processes, each fed one job at a time over its own pipe.
+
+    Jobs wait in a backlog until a worker is idle, so the pool always knows which job each worker
+    holds. A supervisor thread routes results back to asyncio futures and restarts workers that die,
+    retrying the job a crashed worker was running (up to MP_JOB_RETRIES times). Unlike a shared
+    queue, a pipe has no feeder thread to lose a message in and no lock a dying worker can hold.
+    """
+
+    def __init__(self, context, size, slots):
+        self._context = context
+        self.size = size
+        self.slots = slots
+        self._workers = [None] * size
+        self._connections = [None] * size # Our end of each worker's pipe
+        self._lock = threading.Lock()
+        self._pending = {} # job id -> [future, kind, args, retries left]
+        self._backlog = deque() # job ids waiting for an idle worker
+        self._running = {} # worker index -> job id
+        self._job_ids = itertools.count()
+        self._stopping = False
+        self.restarts = 0
+
+    def start(self):
+        for index in range(self.size): self._spawn(index)
+        threading.Thread(target=self._supervise, name="content-supervisor", daemon=True).start()
+
+    def stop(self):
+        self._stopping = True
+        for connection in self._connections:
+            try: connection.send(None)
+            except OSError: pass
+        for process in self._workers:
+            process.join(timeout=2)
+            if process.is_alive(): process.terminate()
+        self.slots.close()
+
+    def _spawn(self, index):
+        connection, worker_connection = self._context.Pipe()
+        process = self._context.Process(target=content_worker_main, args=(index, self.slots, worker_connection),
+                                        name=f"content-worker-{index}", daemon=True)
+        process.start()
+        worker_connection.close() # The worker holds the only other end, so its death shows up as EOF
+        self._workers[index] = process
+        self._connections[index] = connection
+
+    def _dispatch(self):
+        """Sends backlogged jobs to idle workers. Called with self._lock held."""
+        idle = [index for index in range(self.size) if index not in self._running]
+        while idle and self._backlog:
+            job_id = self._backlog.popleft()
+            entry = self._pending.get(job_id)
+            if entry is None: continue # Timed out while waiting
+            index = idle.pop()
+            try: self._connections[index].send((job_id, entry[1], entry[2]))
+            except OSError: # Dead worker; the supervisor restarts it
+                self._backlog.appendleft(job_id)
+                continue
+            self._running[index] = job_id
+
+    async def submit(self, kind, *args):
+        """Runs a job on a worker process and returns its result. Raises RuntimeError if it failed or timed out."""
+        future = asyncio.get_running_loop().create_future()
+        job_id = next(self._job_ids)
+        with self._lock:
+            self._pending[job_id] = [future, kind, args, MP_JOB_RETRIES]
+            self._backlog.append(job_id)
+            self._dispatch()
+        try:
+            return await asyncio.wait_for(future, MP_JOB_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._pending.pop(job_id, None)
+                hung = [index for index, running in self._running.items() if running == job_id]
+            # A worker still on the job is presumed hung; the supervisor restarts it (without a retry)
+            for index in hung: self._workers[index].terminate()
+            metrics.inc("fallbacks", stage="content_job")
+            raise RuntimeError(f"{kind} job timed out after {MP_JOB_TIMEOUT_SECONDS:.0f}s")
+
+    async def prepare(self, job):
+        """Multi-process counterpart of PixelBot.prepare_audio_task. Returns (handle, duration)."""
+        if job.audio_type == 'sfx': return ('sfx', job.data), 0.0 # The audio process plays SFX from its own sound bank
+        try:
+            if job.audio_type == 'pcm': handle = job.data
+            else:
+                print(f"Preparing TTS in a content worker: {job.data}")
+                handle = await self.submit("tts", job.data)
+        except RuntimeError as e: print(f"Error preparing {job.audio_type} in a content worker: {e}"); return None, 0
+        if handle is None: print("TTS Synthesis failed."); return None, 0
+        job.nbytes = handle.nbytes
+        return handle, handle.duration
+
+    def _release_slots(self, payload):
+        """Frees the slots of a result nobody is waiting for any more."""
+        if isinstance(payload, tuple): payload = payload[0] # A segment's (handles, post ids)
+        for handle in (payload if isinstance(payload, list) else [payload]):
+            if isinstance(handle, PCMHandle): self.slots.release(handle.slot)
+
+    def _resolve(self, future, kind, payload):
+        def resolve():
+            if future.done(): self._release_slots(payload)
+            elif kind == "done": future.set_result(payload)
+            else: future.set_exception(RuntimeError(payload))
+        future.get_loop().call_soon_threadsafe(resolve)
+
+    def _handle_result(self, index, message):
+        kind, job_id, payload, worker_metrics = message
+        metrics.merge(worker_metrics)
+        with self._lock:
+            if self._running.get(index) == job_id: del self._running[index]
+            entry = self._pending.pop(job_id, None)
+            self._dispatch()
+        if entry is not None: self._resolve(entry[0], kind, payload)
+        else: self._release_slots(payload)
+
+    def _supervise(self):
+        while not self._stopping:
+            for connection in wait_for_connections(self._connections, timeout=MP_SUPERVISOR_INTERVAL):
+                index = self._connections.index(connection)
+                try: message = connection.recv()
+                except (EOFError, OSError): # The worker died; let it exit so the check below restarts it
+                    self._workers[index].join(timeout=MP_SUPERVISOR_INTERVAL)
+                    continue
+                self._handle_result(index, message)
+            for index, process in enumerate(self._workers):
+                if process.is_alive() or self._stopping: continue
+                print(f"WARN: Content worker #{index} (pid {process.pid}) exited with code {process.exitcode}; restarting it.")
+                metrics.inc("process_restarts", role="content")
+                self.restarts += 1
+                self.slots.reclaim(process.pid)
+                self._connections[index].close()
+                self._spawn(index)
+                with self._lock:
+                    job_id = self._running.pop(index, None)
+                    entry = self._pending.get(job_id)
+                    retry = entry is not None and entry[3] > 0
+                    if retry:
+                        entry[3] -= 1
+                        self._backlog.appendleft(job_id)
+                    elif entry is not None: del self._pending[job_id]
+                    self._dispatch()
+                if entry is not None and not retry: self._resolve(entry[0], "error", f"content worker #{index} crashed")
+
+async def forward_audio_metrics(events):
+    """Sends what the audio process recorded (dead air, playback...) to the main process's metrics."""
+    while True:
+        await asyncio.sleep(MP_SUPERVISOR_INTERVAL)
+        events.put((None, "metrics", metrics.take_snapshot()))
+
+async def serve_audio_commands(slots, commands, events):
+    """Plays what the main process sends, reporting each item's start and end back to it."""
+    loop = asyncio.get_running_loop()
+    forwarder = asyncio.create_task(forward_audio_metrics(events))
+    while True:
+        command = await loop.run_in_executor(None, commands.get)
+        if command is None:
+            forwarder.cancel()
+            events.put((None, "metrics", metrics.take_snapshot()))
+            break
+        play_id, kind, payload = command
+        sound_object = None
+        try:
+            if kind == "pcm":
+                pcm = slots.read(payload)
+                slots.release(payload.slot) # Sound() copies the samples, so the slot can be refilled right away
+                sound_object = pygame.mixer.Sound(buffer=pcm)
+            else: sound_object = sound_bank.get_resident(payload) or sound_bank.load(payload)
+        except Exception as e: print(f"Error loading {kind} in the audio process: {e}")
+        if sound_object is None:
+            events.put((play_id, "finished"))
+            continue
+        started, finished = audio_engine.play(sound_object)
+        started.add_done_callback(lambda _, play_id=play_id: events.put((play_id, "started")))
+        finished.add_done_callback(lambda _, play_id=play_id: events.put((play_id, "finished")))
+
+def audio_process_main(slots, commands, events):
+    """Entry point of the audio process: owns the mixer, the audio engine and the music."""
+    start_local_audio()
+    waited_since = time.perf_counter()
+    while not audio_engine.music_playing() and time.perf_counter() - waited_since < 2.0:
+        time.sleep(AUDIO_ENGINE_TICK)
+    events.put((None, "audible"))
+    sound_bank.load(DRAMA_STINGER_SFX)
+    try:
+        asyncio.run(serve_audio_commands(slots, commands, events))
+    finally:
+        audio_engine.stop()
+
+class RemoteAudioEngine:
+    """Stands in for AudioEngine in multi-process mode, forwarding play requests to the audio process.
+
+    play() returns the same (started, finished) futures, resolved from the audio process's events.
+    If the audio process dies it is restarted, and everything it was playing counts as finished.
+    """
+
+    def __init__(self, context, slots):
+        self._context = context
+        self._slots = slots
+        self._events = context.Queue()
+        self._commands = None
+        self._process = None
+        self._plays = {} # play id -> (started, finished, handle)
+        self._play_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._running = False
+        self.restarts = 0
+
+    def start(self):
+        if self._running: return
+        self._running = True
+        self._spawn()
+        threading.Thread(target=self._supervise, name="audio-supervisor", daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        if self._process is not None and self._process.is_alive():
+            self._commands.put(None)
+            self._process.join(timeout=2)
+            if self._process.is_alive(): self._process.terminate()
+
+    def _spawn(self):
+        self._commands = self._context.Queue() # Fresh queue, in case the old process died holding its lock
+        self._process = self._context.Process(target=audio_process_main, args=(self._slots, self._commands, self._events),
+                                              name="audio-process", daemon=True)
+        self._process.start()
+
+    def play(self, sound_object):
+        """Queues a PCMHandle or ('sfx', path) in the audio process. Returns (started, finished) asyncio futures."""
+        loop = asyncio.get_running_loop()
+        started, finished = loop.create_future(), loop.create_future()
+        play_id = next(self._play_ids)
+        with self._lock: self._plays[play_id] = (started, finished, sound_object)
+        if isinstance(sound_object, PCMHandle):
+            sound_object.sent = True
+            self._commands.put((play_id, "pcm", sound_object))
+        else: self._commands.put((play_id, "sfx", sound_object[1]))
+        return started, finished
+
+    def start_music(self, next_track):
+        pass # The audio process runs its own music library
+
+    def hold_duck(self):
+        pass # Worker-built segments arrive whole, so there are no gaps between parts to hold the duck across
+
+    def release_duck(self):
+        pass
+
+    def is_idle(self):
+        return not self._plays
+
+    @staticmethod
+    def _resolve(future):
+        future.get_loop().call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+    def _supervise(self):
+        while self._running:
+            try:
+                play_id, event, *details = self._events.get(timeout=MP_SUPERVISOR_INTERVAL)
+                if event == "metrics":
+                    metrics.merge(details[0])
+                    continue
+                if event == "audible":
+                    startup.mark_audible()
+                    startup.report()
+                with self._lock: play = self._plays.get(play_id) if event == "started" else self._plays.pop(play_id, None)
+                if play is not None:
+                    self._resolve(play[0])
+                    if event == "finished": self._resolve(play[1])
+                continue
+            except queue.Empty: pass
+            if self._running and not self._process.is_alive():
+                print(f"WARN: Audio process exited with code {self._process.exitcode}; restarting it.")
+                metrics.inc("process_restarts", role="audio")
+                self.restarts += 1
+                with self._lock: plays, self._plays = self._plays, {}
+                for started, finished, handle in plays.values():
+                    if isinstance(handle, PCMHandle): self._slots.release(handle.slot)
+                    self._resolve(started)
+                    self._resolve(finished)
+                self._spawn()
+
+content_workers = None # ContentWorkerPool when MULTIPROCESS_WORKERS is set
+
+def start_multiprocess_station():
+    """start_station() for multi-process mode: playback in its own process, content generation in supervised workers."""
+    global audio_engine, content_workers, TTS_STREAMING_ENABLED
+    TTS_STREAMING_ENABLED = False # Workers hand back whole clips; streaming needs the synthesizer in this process
+    context = multiprocessing.get_context("spawn") # Fresh interpreters rather than forking a process full of threads
+    with startup.phase("pcm slots"):
+        slots = SharedPCMSlots(context, MP_SLOT_COUNT, MP_SLOT_BYTES)
+    with startup.phase("audio process"):
+        audio_engine = RemoteAudioEngine(context, slots)
+        audio_engine.start()
+    with startup.phase("content workers"):
+        content_workers = ContentWorkerPool(context, MULTIPROCESS_WORKERS, slots)
+        content_workers.start()
+    print(f"Multi-process mode: audio process + {MULTIPROCESS_WORKERS} content workers, "
+          f"{MP_SLOT_COUNT} x {MP_SLOT_BYTES // (1024 * 1024)} MB PCM slots.")
+
+# --- Station Startup ---
+_station_started = False
+
+def load_shared_state(*instances):
+    """Builds the given lazy caches and indexes up front, so their startup cost never lands on the first request."""
+    for instance in instances:
+        try: instance.load()
+        except Exception as e: print(f"Error initializing {instance.label}: {e}"); exit()
+
+def start_local_audio():
+    """Initializes pygame.mixer and starts the configured audio backend and the music (in this process)."""
+    global audio_engine
+    load_shared_state(music_library)
+    software = AUDIO_BACKEND == "software"
+    if software and not SOFTWARE_MIXER_SINK.startswith("device"):
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy") # pygame only decodes; the sink does the output
+    with startup.phase("mixer"):
+        pygame.mixer.init(frequency=AZURE_AUDIO_FREQUENCY, size=AZURE_AUDIO_FORMAT_BITS, channels=AZURE_AUDIO_CHANNELS)
+        pygame.mixer.music.set_volume(MUSIC_VOLUME_NORMAL)
+    print(f"Pygame mixer initialized successfully (Freq: {AZURE_AUDIO_FREQUENCY}). Volume: {MUSIC_VOLUME_NORMAL}")
+    with startup.phase("audio engine"):
+        if software:
+            with startup.phase("numpy import"): np.load()
+            audio_engine = SoftwareMixer(open_pcm_sink(SOFTWARE_MIXER_SINK))
+        audio_engine.start()
+        audio_engine.start_music(decode_next_music_track if software else play_next_music_track)
+    music_library.start_rescanning(MUSIC_RESCAN_INTERVAL)
+
+def start_station():
+    """Gets the station on air: audio and music first, then the network clients in the background.
+
+    Returns as soon as music is playing; Reddit, Gemini and Azure finish warming up concurrently and
+    the per-phase timings are printed once they have. Safe to call more than once.
+    """
+    global _station_started
+    if _station_started: return
+    _station_started = True
+    metrics.start_server(METRICS_HOST, METRICS_PORT)
+    metrics.start_trace(METRICS_TRACE_FILE)
+    load_shared_state(post_index) # The main process tracks which posts aired in either mode
+    if MULTIPROCESS_WORKERS:
+        if len(stations) > 1:
+            print(f"WARN: Multi-process mode hosts the default station only; ignoring {len(stations) - 1} more from STATIONS.")
+            del stations[1:]
+        start_multiprocess_station()
+        return
+    for client in (synthesizer_client, gemini_client, reddit_client): client.start()
+    load_shared_state(tts_cache)
+
+    try:
+        start_local_audio()
+        for station in stations[1:]:
+            with startup.phase(f"station {station.name}"): station.start_audio()
+    except Exception as e: print(f"Error starting audio: {e}"); exit()
+    if len(stations) > 1: print(f"Multi-station mode: {len(stations)} stations sharing clients, caches and the seen-post index.")
+
+    def finish_startup():
+        while not audio_engine.music_playing() and time.perf_counter() - started_at < CLIENT_READY_TIMEOUT:
+            time.sleep(AUDIO_ENGINE_TICK)
+        startup.mark_audible()
+        with startup.phase("stinger"):
+            sound_bank.load(DRAMA_STINGER_SFX) # Decode the stinger once, off the critical path
+        for client in (synthesizer_client, gemini_client, reddit_client): client.wait_ready(CLIENT_READY_TIMEOUT)
+        startup.report()
+        print(f"{synthesizer_client.status()}, {gemini_client.status()}, {reddit_client.status()}")
+    started_at = time.perf_counter()
+    threading.Thread(target=finish_startup, name="startup-report", daemon=True).start()
+
 # --- Twitch Bot Class ---
 class PixelBot(commands.Bot):
+    """Runs one station: its Twitch channel's commands, audio pipeline and LSF segments (one bot per station)."""
 
-    def __init__(self):
-        super().__init__(token=twitch_token, prefix='!', initial_channels=[twitch_channel])
+    def __init__(self, station=None):
+        self.station = station or default_station
+        super().__init__(token=twitch_token, prefix='!', initial_channels=[self.station.channel])
         self._audio_processor_task = None
-        self._music_player_task = None
+        self._audio_prefetcher_task = None
         self._lsf_fetcher_task = None
-        self._is_speaking = asyncio.Event() # Event to signal when speech/sfx is playing
+        self._prepared_queue = asyncio.Queue(maxsize=LOOKAHEAD_DEPTH) # AudioJobs waiting to be played, in order
+        self._lookahead_bytes = 0 # Decoded audio currently held by prepared-but-unplayed jobs
+        self._lookahead_changed = asyncio.Condition() # Notified whenever _lookahead_bytes drops
+        self._processor_idle = False # True while audio_processor is waiting for its next job
+        if self.station is default_station: metrics.gauge("lookahead_bytes", lambda: self._lookahead_bytes)
 
     async def event_ready(self):
         print(f'Logged in as | {self.nick}')
         print(f'User id is | {self.user_id}')
-        print(f'Joining channel | {twitch_channel}')
+        print(f'Joining channel | {self.station.channel} (station {self.station.name})')
         # Start background tasks
+        start_station() # Normally already done before connecting to Twitch
+        self._audio_prefetcher_task = asyncio.create_task(self.audio_prefetcher())
         self._audio_processor_task = asyncio.create_task(self.audio_processor())
-        self._music_player_task = asyncio.create_task(self.music_player())
         self._lsf_fetcher_task = asyncio.create_task(self.lsf_fetcher())
 
     async def event_message(self, message):
@@ -230,129 +2801,366 @@ class PixelBot(commands.Bot):
         command_verb = parts[0].lower()
         text_to_process = parts[1] if len(parts) > 1 else None
 
+        if command_verb in ("say", "react") and text_to_process:
+            print(f"Received '!pixel {command_verb}' command from {ctx.author.name}")
+            rejection = self.station.queue.admit_chat(ctx.author.name)
+            if rejection:
+                print(f"Rejected '!pixel {command_verb}' from {ctx.author.name}: {rejection}. {self.station.queue.stats()}")
+                await ctx.send(f"@{ctx.author.name}, {rejection}! Try again in a bit.")
+                return
+
         if command_verb == "say" and text_to_process:
-            print(f"Received '!pixel say' command from {ctx.author.name}")
-            await audio_task_queue.put(('tts', text_to_process)) # Put text in queue
-            await ctx.send(f"Okay @{ctx.author.name}, Pixel will say that!")
+            if await self.station.queue.put(('tts', text_to_process), PRIORITY_CHAT): # Put text in queue
+                await ctx.send(f"Okay @{ctx.author.name}, Pixel will say that!")
+            else:
+                self.station.queue.refund_chat(ctx.author.name)
+                await ctx.send(f"@{ctx.author.name}, Pixel is already going to say that!")
 
         elif command_verb == "react" and text_to_process:
-            print(f"Received '!pixel react' command from {ctx.author.name}")
+            # Coalesce identical topics before paying for a Gemini call
+            react_key = ('react', text_to_process.strip().lower())
+            if not self.station.queue.claim(react_key):
+                self.station.queue.refund_chat(ctx.author.name)
+                await ctx.send(f"@{ctx.author.name}, Pixel is already on that one!")
+                return
             loop = asyncio.get_running_loop()
             try:
                  # Generate reaction using Gemini first
-                 reaction_text = await loop.run_in_executor(None, get_pixel_reaction_text_sync, text_to_process)
-                 await audio_task_queue.put(('tts', reaction_text)) # Put generated text in queue
-                 await ctx.send(f"Okay @{ctx.author.name}, Pixel will react to that!")
+                 if content_workers is not None: reaction_text = await content_workers.submit("react", text_to_process)
+                 else:
+                     async with generation_slots.slot(self.station.name):
+                         reaction_text = await loop.run_in_executor(None, get_pixel_reaction_text_sync, text_to_process,
+                                                                    self.station.persona, self.station.subreddit)
+                 if await self.station.queue.put(('tts', reaction_text), PRIORITY_CHAT): # Put generated text in queue
+                     await ctx.send(f"Okay @{ctx.author.name}, Pixel will react to that!")
+                 else:
+                     self.station.queue.refund_chat(ctx.author.name)
+                     await ctx.send(f"@{ctx.author.name}, Pixel can't fit that reaction in right now! Try again in a bit.")
             except Exception as e:
                  print(f"Error generating Gemini reaction in executor: {e}")
+                 self.station.queue.refund_chat(ctx.author.name)
                  await ctx.send(f"@{ctx.author.name}, Pixel's brain fizzled trying to react to that.")
+            finally:
+                 self.station.queue.release(react_key)
         else:
             await ctx.send(f"@{ctx.author.name}, hmm? Try '!pixel say <your message>' or '!pixel react <topic>'.")
 
+    async def prepare_audio_task(self, job):
+        """Synthesizes (TTS) or loads (SFX) a job into a pygame Sound. Returns (sound_object, duration)."""
+        sound_object = None
+        duration = 0
+
+        if content_workers is not None:
+            sound_object, duration = await content_workers.prepare(job)
+
+        elif job.audio_type == 'tts':
+            text_to_speak = job.data
+            print(f"Preparing TTS: {text_to_speak}")
+            ssml_string = build_tts_ssml(text_to_speak, self.station.voice)
+            loop = asyncio.get_running_loop()
+            async with synthesis_slots.slot(self.station.name):
+                audio_data = await loop.run_in_executor(synthesis_executor, synthesize_speech_to_buffer_sync, ssml_string)
+            if audio_data:
+                try:
+                    decode_started_at = time.perf_counter()
+                    # Sound(buffer=) takes raw samples, so strip the RIFF header rather than play it as a click
+                    sound_object = await loop.run_in_executor(None, lambda: pygame.mixer.Sound(buffer=pcm_from_riff(audio_data)))
+                    metrics.observe("decode", time.perf_counter() - decode_started_at, job.task_id)
+                    duration = sound_object.get_length()
+                    job.nbytes = len(audio_data)
+                    print(f"Synthesized TTS (duration: {duration:.2f}s)")
+                except Exception as e: print(f"Error loading TTS buffer into pygame: {e}")
+            else: print("TTS Synthesis failed.")
+
+        elif job.audio_type == 'segment':
+            segment = job.data
+            try:
+                decode_started_at = time.perf_counter()
+                sound_object = await asyncio.get_running_loop().run_in_executor(None, lambda: pygame.mixer.Sound(buffer=segment.pcm))
+                metrics.observe("decode", time.perf_counter() - decode_started_at, job.task_id)
+                duration = sound_object.get_length()
+                job.nbytes = len(segment.pcm)
+                print(f"Loaded compiled segment ({segment.line_count} reactions, duration: {duration:.2f}s)")
+            except Exception as e: print(f"Error loading compiled segment into pygame: {e}")
+
+        elif job.audio_type == 'sfx':
+            sfx_path = job.data
+            # Resident SFX are counted against the sound bank budget, not the look-ahead one
+            sound_object = sound_bank.get_resident(sfx_path) or await asyncio.get_running_loop().run_in_executor(None, sound_bank.load, sfx_path)
+            if sound_object:
+                duration = sound_object.get_length()
+                print(f"Loaded SFX: {sfx_path} (duration: {duration:.2f}s)")
+
+        self._lookahead_bytes += job.nbytes
+        return sound_object, duration
+
+    def start_preparing(self, job):
+        """Starts preparing a job in the background if nobody has started it yet."""
+        if job.future is None:
+            job.future = asyncio.ensure_future(self.prepare_audio_task(job))
+        return job.future
+
+    async def release_job(self, job):
+        """Returns a played (or failed) job's memory to the look-ahead budget."""
+        if content_workers is not None and job.future is not None and job.future.done() and not job.future.cancelled() and not job.future.exception():
+            handle = job.future.result()[0]
+            if isinstance(handle, PCMHandle) and not handle.sent: content_workers.slots.release(handle.slot) # Prepared but never played
+        self._lookahead_bytes -= job.nbytes
+        job.nbytes = 0
+        await self.notify_lookahead()
+
+    async def notify_lookahead(self):
+        """Wakes the prefetcher after a prepared job is taken or its memory is released."""
+        async with self._lookahead_changed:
+            self._lookahead_changed.notify_all()
+
+    async def stream_tts(self, job):
+        """Plays a TTS job chunk by chunk while Azure is still rendering it.
+
+        Returns the playback-finished future of the last chunk, or None if the stream stalled before
+        any audio arrived, so the caller can use the buffered path. A stall after audio started is
+        recovered by synthesizing the full clip and playing the rest of it.
+        """
+        loop = asyncio.get_running_loop()
+        chunk_queue = asyncio.Queue()
+        cancel = StreamCancel()
+        ssml_string = build_tts_ssml(job.data, self.station.voice)
+        print(f"Streaming TTS: {job.data}")
+
+        started_at = time.perf_counter()
+        await synthesis_slots.acquire(self.station.name) # Held until the stream's synthesizer is free again
+        producer = loop.run_in_executor(synthesis_executor, stream_speech_sync, ssml_string,
+                                        lambda chunk: loop.call_soon_threadsafe(chunk_queue.put_nowait, chunk), cancel)
+        producer.add_done_callback(lambda _: synthesis_slots.release(self.station.name))
+        finished = None
+        bytes_played = 0
+        streamed_chunks = []
+        stalled = False
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunk_queue.get(), STREAM_STALL_TIMEOUT)
+                except asyncio.TimeoutError:
+                    stalled = True
+                    break
+                if chunk is None: break # Synthesis finished (or failed)
+
+                # Chunks are queued back-to-back on the engine's speech channel
+                started, finished = self.station.audio_engine.play(pygame.mixer.Sound(buffer=chunk))
+                if not bytes_played:
+                    started.add_done_callback(lambda _: self.on_air(job))
+                    started.add_done_callback(lambda _: print(f"Time to first audio (streamed): {time.perf_counter() - started_at:.3f}s"))
+                bytes_played += len(chunk)
+                streamed_chunks.append(chunk)
+        finally:
+            cancel.cancel() # A stalled read is stopped too, so the fallback below does not strand a synthesizer, slot and thread
+
+        if finished is None:
+            print("Streaming produced no audio.")
+            return None
+
+        if stalled or not await producer:
+            # Stalled, or Azure canceled mid-stream: play the rest of the line from a buffered synthesis
+            print(f"Stream {'stalled' if stalled else 'ended early'} after {bytes_played} bytes, resuming from buffered synthesis.")
+            metrics.inc("fallbacks", stage="stream_stall" if stalled else "stream_canceled")
+            async with synthesis_slots.slot(self.station.name):
+                audio_data = await loop.run_in_executor(synthesis_executor, synthesize_speech_to_buffer_sync, ssml_string)
+            if audio_data:
+                try:
+                    remainder = pcm_from_riff(audio_data)[bytes_played:]
+                    if remainder: _, finished = self.station.audio_engine.play(pygame.mixer.Sound(buffer=remainder))
+                except Exception as e: print(f"Error resuming interrupted stream: {e}")
+
+        else:
+            # Complete stream: keep it so the next identical line skips Azure entirely
+            await loop.run_in_executor(None, tts_cache.put, ssml_string, riff_from_pcm(b"".join(streamed_chunks)))
+
+        print(f"Streamed TTS rendered ({bytes_played} bytes streamed in {time.perf_counter() - started_at:.2f}s).")
+        return finished
+
+    async def audio_prefetcher(self):
+        """Background task that pulls tasks off the station's queue and prepares up to LOOKAHEAD_DEPTH of them ahead of playback."""
+        print(f"Audio prefetcher task started (depth: {LOOKAHEAD_DEPTH}, memory cap: {LOOKAHEAD_MAX_BYTES // (1024 * 1024)} MB).")
+        while True:
+            try:
+                # Leave tasks in the scheduler (where priorities and deadlines apply) until there is room
+                # to prepare them: fewer than LOOKAHEAD_DEPTH waiting and decoded audio under the memory cap
+                async with self._lookahead_changed:
+                    await self._lookahead_changed.wait_for(
+                        lambda: self._prepared_queue.qsize() < LOOKAHEAD_DEPTH and self._lookahead_bytes < LOOKAHEAD_MAX_BYTES)
+                task = await self.station.queue.get_task()
+                audio_type, data = task.item
+                job = AudioJob(audio_type, data, task.task_id)
+                # An idle processor with nothing waiting will stream this job itself for a faster first word
+                hand_off = TTS_STREAMING_ENABLED and audio_type == 'tts' and self._processor_idle and self._prepared_queue.empty()
+                self._prepared_queue.put_nowait(job)
+                if not hand_off: self.start_preparing(job)
+
+            except asyncio.CancelledError: print("Audio prefetcher task cancelled."); break
+            except Exception as e:
+                print(f"Error in audio prefetcher task: {e}")
+                await asyncio.sleep(1)
+
     async def audio_processor(self):
-        """Background task to process audio requests (TTS & SFX) from the queue."""
+        """Background task to hand prepared audio jobs (TTS & SFX) to the audio engine in queue order.
+
+        Each job is queued on the engine as soon as the previous one starts playing, so items play
+        back-to-back; end-of-playback bookkeeping happens in finish_job.
+        """
         print("Audio processor task started.")
         while True:
+            job = None
             try:
-                audio_type, data = await audio_task_queue.get()
-                print(f"\nProcessing audio task: Type={audio_type}")
-
-                self._is_speaking.set() # Signal that speech/sfx is starting
-                original_volume = pygame.mixer.music.get_volume()
-                pygame.mixer.music.set_volume(MUSIC_VOLUME_LOW)
-                print(f"Lowering music volume to {MUSIC_VOLUME_LOW}")
-                time.sleep(0.2) # Allow volume change
-
-                sound_object = None
-                duration = 0
-                success = False
-
-                if audio_type == 'tts':
-                    text_to_speak = data
-                    print(f"Pixel's response: {text_to_speak}")
-                    voice_name = "en-US-JennyNeural"
-                    ssml_string = f"""
-                    <speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xmlns:mstts='http://www.w3.org/2001/mstts' xml:lang='en-US'>
-                        <voice name='{voice_name}'>
-                            <mstts:express-as style='cheerful'>
-                                <prosody rate='-30.00%' pitch='-25.00%'>
-                                    {html.escape(text_to_speak)}
-                                </prosody>
-                            </mstts:express-as>
-                        </voice>
-                    </speak>
-                    """
-                    loop = asyncio.get_running_loop()
-                    audio_data = await loop.run_in_executor(None, synthesize_speech_to_buffer_sync, ssml_string)
-                    if audio_data:
-                        try:
-                            sound_object = pygame.mixer.Sound(buffer=audio_data)
-                            duration = sound_object.get_length()
-                            print(f"Synthesized TTS (duration: {duration:.2f}s)")
-                            success = True
-                        except Exception as e: print(f"Error loading TTS buffer into pygame: {e}")
-                    else: print("TTS Synthesis failed.")
-
-                elif audio_type == 'sfx':
-                    sfx_path = data
-                    if not os.path.exists(sfx_path): print(f"ERROR: SFX file not found: {sfx_path}")
-                    else:
-                        try:
-                            sound_object = pygame.mixer.Sound(sfx_path)
-                            duration = sound_object.get_length()
-                            print(f"Loaded SFX: {sfx_path} (duration: {duration:.2f}s)")
-                            success = True
-                        except Exception as e: print(f"Error loading SFX into pygame: {e}")
-
-                # --- Play the sound if loaded successfully ---
-                if success and sound_object:
-                    try:
-                        print(f"Playing {audio_type}...")
-                        sound_object.play()
-                        # WARNING: This sleep blocks the event loop. Not ideal.
-                        await asyncio.sleep(duration + 0.3) # Use asyncio.sleep, wait for playback
-                        print(f"{audio_type} playback finished.")
-                    except Exception as e: print(f"Error playing {audio_type}: {e}")
-                    finally:
-                         if sound_object: del sound_object; sound_object = None # Clean up sound
-
-                # --- Restore Volume and Signal ---
-                pygame.mixer.music.set_volume(MUSIC_VOLUME_NORMAL)
-                print(f"Restoring music volume to {MUSIC_VOLUME_NORMAL}")
-                self._is_speaking.clear() # Signal that speech/sfx is finished
-                audio_task_queue.task_done()
-                print("Audio task processed.")
+                self._processor_idle = True
+                job = await self._prepared_queue.get()
+                self._processor_idle = False
+                await self.notify_lookahead() # Room for the prefetcher to take another task
+                if self.station.queue.drop_if_stale(job.task_id): # Expired while waiting behind earlier items
+                    if job.future is not None: job.future.cancel()
+                    await self.finish_job(job, None)
+                    continue
+                print(f"\nProcessing audio task: Type={job.audio_type}")
+                finished = None
+                if job.future is None and job.audio_type == 'tts' and TTS_STREAMING_ENABLED and not tts_cache.contains(build_tts_ssml(job.data, self.station.voice)):
+                    # Nothing was prepared ahead, so stream it rather than wait for the whole clip
+                    finished = await self.stream_tts(job)
+                    if finished is None:
+                        print("Streaming failed before any audio played, falling back to buffered synthesis.")
+                        metrics.inc("fallbacks", stage="stream")
+
+                if finished is None:
+                    # Usually already finished by the prefetcher while the previous item played
+                    sound_object, duration = await self.start_preparing(job)
+                    if sound_object:
+                        print(f"Queueing {job.audio_type} for playback ({duration:.2f}s)...")
+                        started, finished = self.station.audio_engine.play(sound_object)
+                        await started # Hold the next job until this one is on air
+                        self.on_air(job)
+
+                asyncio.ensure_future(self.finish_job(job, finished))
 
             except asyncio.CancelledError: print("Audio processor task cancelled."); break
             except Exception as e:
                 print(f"Error in audio processor task: {e}")
-                self._is_speaking.clear() # Ensure event is cleared on error
-                pygame.mixer.music.set_volume(MUSIC_VOLUME_NORMAL) # Restore volume on error
-                audio_task_queue.task_done() # Mark task done even on error to avoid blockage
-                await asyncio.sleep(5) # Avoid rapid error loops
+                self._processor_idle = False
+                if job is not None: await self.finish_job(job, None)
+                await asyncio.sleep(1) # Avoid rapid error loops
 
-    async def music_player(self):
-        """Background task to play music when Pixel isn't speaking."""
-        print("Music player task started.")
-        await asyncio.sleep(2) # Initial delay
-        play_next_music_track() # Start first track
+    def on_air(self, job):
+        """Called when a job's first audio starts playing."""
+        job.on_air_at = time.perf_counter()
+        self.station.queue.mark_on_air(job.task_id)
+        metrics.observe("first_audio", job.on_air_at - job.dequeued_at, job.task_id, type=job.audio_type, station=self.station.name)
+        self.station.record_on_air(job.on_air_at - job.dequeued_at)
+        print(f"{job.audio_type} on air {job.on_air_at - job.dequeued_at:.2f}s after leaving the queue.")
 
-        while True:
+    async def finish_job(self, job, finished):
+        """Waits for a job's playback to end, then releases its look-ahead memory and marks it done."""
+        try:
+            if finished is not None:
+                await finished
+                if job.on_air_at is not None:
+                    metrics.observe("playback", time.perf_counter() - job.on_air_at, job.task_id, type=job.audio_type, station=self.station.name)
+                    self.station.record_aired(time.perf_counter() - job.on_air_at)
+                print(f"{job.audio_type} playback finished.")
+        finally:
+            await self.release_job(job)
+            self.station.queue.task_done(job.task_id)
+            if job.audio_type == 'segment' and job.data.aired is not None and not job.data.aired.done(): job.data.aired.set_result(None)
+
+    async def queue_segment_items(self, new_posts, memoized):
+        """Queues the segment item by item: stinger, intro, then each reaction as soon as it is ready.
+        Returns the number of reactions queued."""
+        loop = asyncio.get_running_loop()
+        self.station.queue.open_segment() # Chat waits until the whole segment is queued
+        try:
+            # Queue Stinger
+            await self.station.queue.put(('sfx', DRAMA_STINGER_SFX))
+
+            # Queue Intro Line
+            await self.station.queue.put(('tts', self.station.intro))
+
+            # Queue Reactions for each post title, in order, as soon as each one is ready
+            i = 0
+            async for post_id, reaction_text in segment_reactions(self.station, new_posts, memoized):
+                i += 1
+                print(f"Queueing reaction for Post {i}/{len(new_posts)}...")
+                await self.station.queue.put(('tts', reaction_text))
+                await loop.run_in_executor(None, post_index.mark_queued, self.station.name, post_id)
+        finally:
+            self.station.queue.close_segment()
+        return i
+
+    async def queue_compiled_segment(self, new_posts, memoized):
+        """Queues the segment as gapless compiled parts: the first as soon as it has a reaction, the rest as their lines are ready.
+
+        Nothing is held in the scheduler until the first part is queued, so chat and the segment on air
+        carry on meanwhile; from then on chat waits until the last part is queued, so the segment airs
+        contiguously, and the music stays ducked until the last part has played, so the whole segment
+        is one duck. A segment without a single reaction isn't queued at all. Returns the number of
+        reactions queued.
+        """
+        loop = asyncio.get_running_loop()
+        engine = self.station.audio_engine
+        queued = 0
+        last_part = None
+        try:
+            async for segment, aired_post_ids in compile_lsf_segment_parts(self.station, new_posts, memoized):
+                if not queued:
+                    self.station.queue.open_segment()
+                    engine.hold_duck()
+                segment.aired = loop.create_future()
+                await self.station.queue.put(('segment', segment))
+                last_part = segment
+                queued += segment.line_count
+                for post_id in aired_post_ids: await loop.run_in_executor(None, post_index.mark_queued, self.station.name, post_id)
+        finally:
+            if queued:
+                self.station.queue.close_segment()
+                last_part.aired.add_done_callback(lambda _: engine.release_duck())
+        if not queued: print("No reactions could be synthesized for this segment.")
+        return queued
+
+    async def run_lsf_segment(self):
+        """Fetches new LSF posts and queues a segment: stinger, intro, then one reaction per post."""
+        if content_workers is not None:
             try:
-                # If Pixel is speaking OR music is already playing, wait.
-                if self._is_speaking.is_set() or pygame.mixer.music.get_busy():
-                    await asyncio.sleep(1) # Check again in 1 second
-                    continue
+                result = await content_workers.submit("segment") # Fetch, reactions, synthesis and mixing all happen in a worker
+            except RuntimeError as e: print(f"Error building LSF segment in a content worker: {e}"); return
+            if result is None: print("No new LSF posts fetched this interval."); return
+            handles, aired_post_ids = result
+            self.station.queue.open_segment()
+            try:
+                for handle in handles: await self.station.queue.put(('pcm', handle))
+            finally:
+                self.station.queue.close_segment()
+            loop = asyncio.get_running_loop()
+            for post_id in aired_post_ids: await loop.run_in_executor(None, post_index.mark_queued, self.station.name, post_id)
+            self.station.segments_queued += 1
+            print(f"Queued a {sum(handle.duration for handle in handles):.1f}s LSF segment compiled by a content worker ({len(handles)} slots).")
+            return
+        loop = asyncio.get_running_loop()
+        new_posts = await loop.run_in_executor(None, get_new_lsf_posts_sync, self.station, POST_LIMIT)
 
-                # If not speaking and music stopped, play next track
-                print("\nMusic track finished or stopped, playing next.")
-                play_next_music_track()
-                await asyncio.sleep(1) # Small delay after starting track
+        if new_posts:
+            print("\n>>> Queueing Pixel reactions for LSF Top Posts <<<")
+            post_ids = [post_id for post_id, _ in new_posts]
+            try:
+                # Reactions generated before a restart (or by an earlier fetch) are reused
+                memoized = await loop.run_in_executor(None, post_index.get_reactions, self.station.persona_key, post_ids)
+                if any(memoized): print(f"Reusing {sum(r is not None for r in memoized)} memoized reactions.")
+                if SEGMENT_COMPILER_ENABLED: queued = await self.queue_compiled_segment(new_posts, memoized)
+                else: queued = await self.queue_segment_items(new_posts, memoized)
+            finally:
+                post_index.release(self.station.name, post_ids) # Anything not queued can be retried next fetch
+            if not queued: print("Nothing from this fetch was queued; its posts will be retried."); return
 
-            except asyncio.CancelledError: print("Music player task cancelled."); break
-            except Exception as e:
-                print(f"Error in music player task: {e}")
-                await asyncio.sleep(10) # Wait longer after an error
+            self.station.segments_queued += 1
+            print("Finished queueing LSF segment.")
+            synthesizer_pool = synthesizer_client.peek()
+            print(f"{tts_cache.stats()}\n{synthesizer_pool.stats() if synthesizer_pool else synthesizer_client.status()}\n{self.station.queue.stats()}\n{self.station.stats()}")
+        else:
+            print("No new LSF posts fetched this interval.")
 
     async def lsf_fetcher(self):
         """Background task to periodically fetch LSF posts and queue reactions."""
@@ -365,30 +3173,7 @@ class PixelBot(commands.Bot):
                 await asyncio.sleep(FETCH_INTERVAL_SECONDS)
 
                 print(f"\n--- Time to fetch LSF posts ---")
-                loop = asyncio.get_running_loop()
-                post_titles = await loop.run_in_executor(None, get_lsf_top_posts_sync, POST_LIMIT)
-
-                if post_titles:
-                    print("\n>>> Queueing Pixel reactions for LSF Top Posts <<<")
-
-                    # Queue Stinger
-                    await audio_task_queue.put(('sfx', DRAMA_STINGER_SFX))
-
-                    # Queue Intro Line
-                    intro_text = "Hold up, hold up! We got some breaking TEA coming in hot! Let's get riiiight into the drama!"
-                    await audio_task_queue.put(('tts', intro_text))
-
-                    # Queue Reactions for each post title
-                    for i, title in enumerate(post_titles):
-                        print(f"Generating reaction for Post {i+1}/{len(post_titles)}...")
-                        # Run Gemini call in executor
-                        reaction_text = await loop.run_in_executor(None, get_pixel_reaction_text_sync, title)
-                        await audio_task_queue.put(('tts', reaction_text))
-                        await asyncio.sleep(0.5) # Small delay between queueing reactions
-
-                    print("Finished queueing LSF segment.")
-                else:
-                    print("No LSF posts fetched this interval.")
+                await self.run_lsf_segment()
 
             except asyncio.CancelledError: print("LSF fetcher task cancelled."); break
             except Exception as e:
@@ -397,13 +3182,19 @@ class PixelBot(commands.Bot):
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    bot = PixelBot()
+    start_station() # On air before the Twitch connection is even attempted
+    bots = [PixelBot(station) for station in stations] # All on the same event loop
     try:
-        print("Starting Twitch bot...")
-        bot.run()
+        print(f"Starting Twitch bot{'s' if len(bots) > 1 else ''}...")
+        for bot in bots[1:]: bot.loop.create_task(bot.connect())
+        bots[0].run()
     except KeyboardInterrupt:
         print("\nCtrl+C received, shutting down.")
     finally:
+        for station in stations:
+            print(station.stats())
+            station.audio_engine.stop()
+        if content_workers is not None: content_workers.stop()
         # Clean up pygame mixer if it was initialized
         if pygame.mixer.get_init():
             pygame.mixer.quit()